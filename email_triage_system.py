@@ -13,16 +13,22 @@ Features:
 - Text-to-speech for hands-free operation
 """
 
+import base64
 import json
 import os
+import queue
 import re
 import sqlite3
 import sys
 import termios
+import threading
 import tty
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, replace
 from pathlib import Path
 import hashlib
 
@@ -35,6 +41,7 @@ except ImportError:
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     HAS_REQUESTS = True
 except ImportError:
     HAS_REQUESTS = False
@@ -58,8 +65,44 @@ try:
 except ImportError:
     HAS_OPT_OUT = False
 
+# Static instructions for AI classification; the per-email details go in the user message
+CLASSIFICATION_SYSTEM_PROMPT = (
+    "You are an email triage assistant. Classify the email into one category: "
+    "\"trash\" (marketing, spam, newsletters, ignorable notifications), "
+    "\"revisit\" (maybe important, not urgent), "
+    "\"action_needed\" (needs human attention, response or action). "
+    "Reply with a JSON object: {\"action\": \"trash|revisit|action_needed\", "
+    "\"confidence\": 0.0-1.0, \"reasoning\": \"brief explanation\", "
+    "\"suggested_rule\": \"optional rule for similar emails\"}"
+)
 
-@dataclass
+# Write statements, kept as constants so sqlite3's statement cache reuses them
+INSERT_DECISION_SQL = '''
+    INSERT INTO decisions (email_id, sender, subject, action, reasoning, was_auto_decided)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# New patterns start at 0.6 confidence, known ones are reinforced
+UPSERT_PREFERENCE_SQL = '''
+    INSERT INTO preferences (pattern_type, pattern_value, action, confidence, usage_count)
+    VALUES (?, ?, ?, 0.6, 1)
+    ON CONFLICT(pattern_type, pattern_value, action) DO UPDATE SET
+        confidence = confidence + 0.1,
+        usage_count = usage_count + 1
+'''
+
+# Connection pool size for unsubscribe requests
+UNSUBSCRIBE_POOL_SIZE = 32
+
+# Display strings for the auto-processing summary
+ACTION_ICONS = {"trash": "🗑️", "revisit": "⏰", "action_needed": "⚡"}
+ACTION_NAMES = {action: action.replace('_', ' ').title() for action in ACTION_ICONS}
+
+# Slotted dataclasses (no per-instance __dict__) where the interpreter supports them
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**DATACLASS_SLOTS)
 class EmailItem:
     """Represents an email item for processing"""
     id: str
@@ -72,13 +115,33 @@ class EmailItem:
     has_unsubscribe: bool = False
     unsubscribe_link: str = ""
     sender_domain: str = ""
+    raw_body: str = ""  # base64url text body as returned by Gmail, decoded on demand
+    
+    # Derived once at parse time for the classifier and preference lookups
+    _subject_lower: str = field(default="", init=False, repr=False, compare=False)
+    _snippet_lower: str = field(default="", init=False, repr=False, compare=False)
+    _subject_tokens: List[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    _body: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if not self.sender_domain and '@' in self.sender:
             self.sender_domain = self.sender.split('@')[-1]
+        # .lower(), not .casefold(): subject tokens are the stored subject_keyword keys
+        self._subject_lower = self.subject.lower()
+        self._snippet_lower = self.snippet.lower()
+        self._subject_tokens = self._subject_lower.split()
+    
+    @property
+    def body(self) -> str:
+        """Decoded text body; decoded on first access and memoized"""
+        if self._body is None:
+            data = self.raw_body
+            # Gmail strips base64 padding
+            self._body = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode('utf-8', 'replace') if data else ""
+        return self._body
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TriageDecision:
     """Represents a triage decision"""
     email_id: str
@@ -88,7 +151,7 @@ class TriageDecision:
     suggested_rule: Optional[str] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class UserPreference:
     """Represents a learned user preference"""
     pattern_type: str  # 'sender', 'domain', 'subject_keyword', 'content_pattern'
@@ -99,8 +162,82 @@ class UserPreference:
     usage_count: int = 0
 
 
+def _fingerprint(*parts) -> str:
+    """Short non-cryptographic cache key; BLAKE2b is faster than SHA-2 in CPython"""
+    data = '|'.join(str(part) for part in parts)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def _normalize_subject(subject: str) -> str:
+    """Reduce a subject to its template so per-issue numbers don't defeat caching"""
+    return ' '.join(_DIGITS_RE.sub('#', subject.lower()).split())
+
+
+def _classification_key(email: EmailItem) -> Tuple[str, str, bool]:
+    """Sender and subject template shared by the AI result cache and in-batch deduplication"""
+    return email.sender, _normalize_subject(email.subject), email.has_unsubscribe
+
+
+def _compile_keywords(keywords: List[str]) -> Optional[re.Pattern]:
+    """Compile keywords into one alternation, longest first; None if there are none"""
+    keywords = sorted({keyword.lower() for keyword in keywords if keyword}, key=len, reverse=True)
+    if not keywords:
+        return None
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+def score_keywords(text: str, important_re: Optional[re.Pattern],
+                   marketing_keywords: Tuple[str, ...]) -> Tuple[bool, int]:
+    """Return (has important keyword, number of marketing keywords present) for text"""
+    if important_re and important_re.search(text):
+        # Important emails short-circuit the classifier, no need to score marketing
+        return True, 0
+    # Each keyword is tested on its own so overlapping ones ("sale"/"sales") all count
+    return False, sum(keyword in text for keyword in marketing_keywords)
+
+
+# Set while a raw_stdin() block owns the terminal mode
+_raw_stdin_active = False
+
+
+@contextmanager
+def raw_stdin():
+    """Hold stdin in raw mode for a whole interaction instead of per keystroke"""
+    global _raw_stdin_active
+    try:
+        fd = sys.stdin.fileno()
+        old_settings = termios.tcgetattr(fd)
+    except Exception:
+        # Not a terminal; getch() falls back to its own handling
+        yield
+        return
+    
+    tty.setraw(fd)
+    # Keep output post-processing so prints inside the block still render normally
+    attrs = termios.tcgetattr(fd)
+    attrs[1] |= termios.OPOST
+    termios.tcsetattr(fd, termios.TCSADRAIN, attrs)
+    _raw_stdin_active = True
+    try:
+        yield
+    finally:
+        _raw_stdin_active = False
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+
 def getch():
     """Get a single character from stdin without pressing enter"""
+    if _raw_stdin_active:
+        return sys.stdin.read(1)
+    
     try:
         # Unix/Linux/macOS
         fd = sys.stdin.fileno()
@@ -128,13 +265,29 @@ class EmailTriageSystem:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
-        # Initialize database
+        # Initialize database (one long-lived connection, shared with TTS threads)
         self.db_path = self.data_dir / "preferences.db"
+        self._db_lock = threading.Lock()
+        self._conn = self._connect()
         self.init_database()
         
         # Load configuration first
         self.config = self.load_config()
         
+        self._apply_config()
+        
+        # OpenAI client is created lazily and shared by classification workers
+        self._openai_client = None
+        
+        # Pooled HTTP session so repeated unsubscribe requests reuse connections
+        self._http = None
+        if HAS_REQUESTS:
+            self._http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=UNSUBSCRIBE_POOL_SIZE,
+                                  pool_maxsize=UNSUBSCRIBE_POOL_SIZE)
+            self._http.mount('https://', adapter)
+            self._http.mount('http://', adapter)
+        
         # Initialize opt-out manager
         self.opt_out_manager = None
         if HAS_OPT_OUT:
@@ -147,7 +300,14 @@ class EmailTriageSystem:
         self.tts_manager = None
         if HAS_TTS_MANAGER:
             try:
-                self.tts_manager = TTSManager(self.config)
+                self.tts_manager = TTSManager(self.config, str(self.data_dir / "tts_cache"))
+                # Prewarming only pays off when speech is rendered by ElevenLabs
+                self._prewarm_next_speech = (self._prewarm_next_speech
+                                             and self.tts_manager.will_use_elevenlabs())
+                # Stage 1 of staged speech is always one of these phrases
+                self.tts_manager.prewarm([
+                    f"Should I {action}" for action in ('trash', 'revisit', 'action_needed')
+                ])
             except Exception as e:
                 print(f"⚠️  TTS Manager initialization failed: {e}")
         elif HAS_TTS:
@@ -158,6 +318,14 @@ class EmailTriageSystem:
             except:
                 pass
         
+        # Single background worker for speech jobs; the generation counter lets
+        # a keypress cancel jobs that are already queued or mid-way through
+        self._speech_queue = queue.Queue()
+        self._speech_generation = 0
+        self._speech_cancelled = threading.Event()
+        self._speech_thread = threading.Thread(target=self._speech_worker, daemon=True)
+        self._speech_thread.start()
+        
         # Statistics
         self.session_stats = {
             'processed': 0,
@@ -167,39 +335,89 @@ class EmailTriageSystem:
             'auto_decided': 0
         }
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the preferences database in autocommit mode with tuned PRAGMAs"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        return conn
+    
+    def close(self):
+        """Stop the speech worker and audio output, and close the preferences database, HTTP session and opt-out log"""
+        self._cancel_pending_speech()
+        self._speech_queue.put((None, self._speech_generation))
+        self._speech_thread.join(timeout=2)
+        if self.tts_manager:
+            self.tts_manager.shutdown()
+        
+        with self._db_lock:
+            self._conn.close()
+        if self._http is not None:
+            self._http.close()
+        if self.opt_out_manager is not None:
+            self.opt_out_manager.close()
+    
+    @contextmanager
+    def db_cursor(self):
+        """Cursor on the shared preferences connection (autocommit), held under the database lock"""
+        with self._db_lock:
+            yield self._conn.cursor()
+    
     def init_database(self):
         """Initialize SQLite database for preferences"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS preferences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pattern_type TEXT NOT NULL,
-                pattern_value TEXT NOT NULL,
-                action TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usage_count INTEGER DEFAULT 0,
-                UNIQUE(pattern_type, pattern_value, action)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS decisions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email_id TEXT NOT NULL,
-                sender TEXT,
-                subject TEXT,
-                action TEXT NOT NULL,
-                reasoning TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                was_auto_decided BOOLEAN DEFAULT FALSE
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS preferences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pattern_type TEXT NOT NULL,
+                    pattern_value TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    usage_count INTEGER DEFAULT 0,
+                    UNIQUE(pattern_type, pattern_value, action)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS decisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    email_id TEXT NOT NULL,
+                    sender TEXT,
+                    subject TEXT,
+                    action TEXT NOT NULL,
+                    reasoning TEXT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    was_auto_decided BOOLEAN DEFAULT FALSE
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS classification_cache (
+                    key TEXT PRIMARY KEY,
+                    action TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    reasoning TEXT,
+                    ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Lookups by (pattern_type, pattern_value) are already served by the
+            # UNIQUE constraint's index; this one covers the ranked listing
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_pref_conf
+                ON preferences(confidence DESC, usage_count DESC)
+            ''')
+            
+            # Lets the per-action decision counts scan a narrow index instead of the table
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_decisions_action
+                ON decisions(action)
+            ''')
     
     def load_config(self) -> Dict:
         """Load configuration from file"""
@@ -207,7 +425,12 @@ class EmailTriageSystem:
         default_config = {
             "openai_api_key": "",
             "auto_decide_threshold": 0.85,
+            "openai_model": "gpt-4o-mini",
+            "openai_timeout": 10.0,
+            "ai_max_workers": 8,
+            "classification_cache_days": 30,
             "enable_tts": True,
+            "prewarm_next_email_speech": True,
             "enable_auto_unsubscribe": True,
             "unsubscribe_domains_whitelist": [
                 "github.com", "stackoverflow.com", "medium.com"
@@ -235,6 +458,25 @@ class EmailTriageSystem:
         
         return config
     
+    def _apply_config(self):
+        """Derive the lookup structures used on hot paths from self.config"""
+        config = self.config
+        self._auto_threshold = float(config.get('auto_decide_threshold', 0.85))
+        self._tts_enabled = bool(config.get('enable_tts', True))
+        self._prewarm_next_speech = self._tts_enabled and bool(config.get('prewarm_next_email_speech', True))
+        self._ai_enabled = HAS_OPENAI and bool(config.get('openai_api_key'))
+        self._ai_model = config.get('openai_model', 'gpt-4o-mini')
+        self._ai_timeout = float(config.get('openai_timeout', 10.0))
+        self._ai_max_workers = int(config.get('ai_max_workers', 8))
+        self._cache_max_age = f"-{int(config.get('classification_cache_days', 30))} days"
+        self._whitelist_tuple = tuple(config.get('unsubscribe_domains_whitelist', []))
+        
+        # Keyword matchers for rule-based classification
+        self._important_re = _compile_keywords(config.get('important_keywords', []))
+        self._marketing_keywords = tuple(
+            keyword.lower() for keyword in config.get('marketing_keywords', []) if keyword
+        )
+    
     def save_config(self, config: Dict):
         """Save configuration to file"""
         config_path = self.data_dir / "config.json"
@@ -243,10 +485,10 @@ class EmailTriageSystem:
     
     def speak(self, text: str):
         """Text-to-speech output (blocking)"""
-        if self.tts_manager and self.config.get('enable_tts', True):
+        if self.tts_manager and self._tts_enabled:
             # Use the advanced TTS manager
             self.tts_manager.speak(text)
-        elif hasattr(self, 'tts_engine') and self.tts_engine and self.config.get('enable_tts', True):
+        elif hasattr(self, 'tts_engine') and self.tts_engine and self._tts_enabled:
             # Fallback to basic pyttsx3
             try:
                 self.tts_engine.say(text)
@@ -259,64 +501,96 @@ class EmailTriageSystem:
     
     def speak_async(self, text: str):
         """Text-to-speech output (non-blocking)"""
-        if self.tts_manager and self.config.get('enable_tts', True):
+        if self.tts_manager and self._tts_enabled:
             # Use the advanced TTS manager's async method
             self.tts_manager.speak_async(text)
-        elif hasattr(self, 'tts_engine') and self.tts_engine and self.config.get('enable_tts', True):
-            # Fallback to basic pyttsx3 in a thread
-            import threading
-            def speak_thread():
+        elif hasattr(self, 'tts_engine') and self.tts_engine and self._tts_enabled:
+            # Fallback to basic pyttsx3 on the speech worker
+            def speak_job(generation):
                 try:
                     self.tts_engine.say(text)
                     self.tts_engine.runAndWait()
                 except:
                     pass
-            thread = threading.Thread(target=speak_thread, daemon=True)
-            thread.start()
+            self._speech_queue.put((speak_job, self._speech_generation))
         else:
             # Text fallback
             print(f"🔊 {text}")
     
+    def _speech_worker(self):
+        """Run queued speech jobs one at a time, skipping cancelled ones"""
+        while True:
+            job, generation = self._speech_queue.get()
+            if job is None:
+                # Shutdown sentinel from close()
+                return
+            if generation != self._speech_generation:
+                continue
+            self._speech_cancelled.clear()
+            try:
+                job(generation)
+            except Exception as e:
+                print(f"⚠️  Speech worker error: {e}")
+    
+    def _cancel_pending_speech(self):
+        """Drop queued speech jobs and stop in-flight staged speech at its next stage"""
+        self._speech_generation += 1
+        self._speech_cancelled.set()
+        while True:
+            try:
+                self._speech_queue.get_nowait()
+            except queue.Empty:
+                break
+    
+    @staticmethod
+    def _staged_speech_texts(email: EmailItem, suggested_decision: TriageDecision) -> Tuple[str, str, str]:
+        """Texts for the three speech stages; the reasoning stage is empty when too long to speak"""
+        reasoning = suggested_decision.reasoning if len(suggested_decision.reasoning) < 100 else ""
+        return (f"Should I {suggested_decision.action}",
+                f"Email from {email.sender}. Subject: {email.subject}.",
+                reasoning)
+    
     def _speak_email_details_staged(self, email: EmailItem, suggested_decision: TriageDecision):
         """Speak email details in stages: AI suggestion first, then details"""
-        import threading
-        import time
+        stage1_text, stage2_text, stage3_text = self._staged_speech_texts(email, suggested_decision)
         
-        def staged_speech():
+        def staged_speech(generation):
             try:
                 # Stage 1: AI suggestion (most important - speak immediately)
-                stage1_text = f"Should I {suggested_decision.action}"
                 if self.tts_manager:
                     self.tts_manager.speak(stage1_text, interruptible=True)
                 else:
                     print(f"🔊 {stage1_text}")
                 
-                # Brief pause to allow user to process and potentially interrupt
-                time.sleep(0.5)
+                # Brief pause to allow user to process and potentially interrupt;
+                # a keypress ends the pause immediately
+                self._speech_cancelled.wait(0.5)
                 
                 # Check if we should continue (not interrupted)
+                if generation != self._speech_generation:
+                    return
                 if self.tts_manager and hasattr(self.tts_manager, 'interrupt_flag'):
                     if self.tts_manager.interrupt_flag.is_set():
                         return
                 
                 # Stage 2: Email details
-                stage2_text = f"Email from {email.sender}. Subject: {email.subject}."
                 if self.tts_manager:
                     self.tts_manager.speak(stage2_text, interruptible=True)
                 else:
                     print(f"🔊 {stage2_text}")
                 
                 # Another brief pause
-                time.sleep(0.3)
+                self._speech_cancelled.wait(0.3)
                 
                 # Check again for interruption
+                if generation != self._speech_generation:
+                    return
                 if self.tts_manager and hasattr(self.tts_manager, 'interrupt_flag'):
                     if self.tts_manager.interrupt_flag.is_set():
                         return
                 
-                # Stage 3: Reasoning (least critical)
-                if len(suggested_decision.reasoning) < 100:  # Only if reasoning is short
-                    stage3_text = suggested_decision.reasoning
+                # Stage 3: Reasoning (least critical), only if short enough to speak
+                if stage3_text:
                     if self.tts_manager:
                         self.tts_manager.speak(stage3_text, interruptible=True)
                     else:
@@ -325,67 +599,143 @@ class EmailTriageSystem:
             except Exception as e:
                 print(f"⚠️  Staged speech error: {e}")
         
-        # Start staged speech in background thread
-        speech_thread = threading.Thread(target=staged_speech, daemon=True)
-        speech_thread.start()
+        # Hand staged speech to the speech worker
+        self._speech_queue.put((staged_speech, self._speech_generation))
+    
+    def _get_openai_client(self):
+        """Return the shared OpenAI client, creating it on first use"""
+        if self._openai_client is None:
+            self._openai_client = openai.OpenAI(api_key=self.config['openai_api_key'])
+        return self._openai_client
+    
+    def _preference_context(self) -> str:
+        """Format the top learned preferences as prompt context"""
+        preferences = self.get_learned_preferences()
+        return "\n".join([
+            f"- {p.pattern_type}:{p.pattern_value} → {p.action} (confidence: {p.confidence:.2f})"
+            for p in preferences[:10]  # Top 10 most confident
+        ])
+    
+    def classify_emails_ai(self, emails: List[EmailItem]) -> List[TriageDecision]:
+        """Classify several emails concurrently, preserving input order"""
+        if not emails:
+            return []
+        
+        if not self._ai_enabled:
+            # Rules read each email's own snippet, so every email is scored separately
+            return [self.classify_email_rules(email) for email in emails]
+        
+        # Emails from the same sender with the same subject template get the same AI
+        # answer, so only one representative per group is sent to OpenAI
+        keys = [_classification_key(email) for email in emails]
+        representatives = {}
+        for key, email in zip(keys, emails):
+            representatives.setdefault(key, email)
+        
+        # Requests are network-bound, so threads overlap the round-trips
+        pref_context = self._preference_context()
+        max_workers = min(self._ai_max_workers, len(representatives))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            ai_decisions = dict(zip(representatives, executor.map(
+                lambda email: self._request_ai_classification(email, pref_context),
+                representatives.values()
+            )))
+        
+        # A failed AI call falls back to rules for each member, not just the representative
+        return [
+            replace(ai_decisions[key], email_id=email.id) if ai_decisions[key]
+            else self.classify_email_rules(email)
+            for key, email in zip(keys, emails)
+        ]
     
-    def classify_email_ai(self, email: EmailItem) -> TriageDecision:
+    def _classification_cache_key(self, email: EmailItem) -> str:
+        """Cache key for emails that should classify the same way"""
+        return _fingerprint(*_classification_key(email))
+    
+    def _get_cached_classification(self, email: EmailItem) -> Optional[TriageDecision]:
+        """Return a recent AI classification for an equivalent email, if any"""
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            cursor.execute(
+                "SELECT action, confidence, reasoning FROM classification_cache "
+                "WHERE key=? AND ts >= datetime('now', ?)",
+                (self._classification_cache_key(email), self._cache_max_age)
+            )
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        return TriageDecision(
+            email_id=email.id,
+            action=row[0],
+            confidence=row[1],
+            reasoning=row[2]
+        )
+    
+    def _cache_classification(self, email: EmailItem, decision: TriageDecision):
+        """Remember an AI classification for equivalent future emails"""
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classification_cache (key, action, confidence, reasoning) "
+                "VALUES (?, ?, ?, ?)",
+                (self._classification_cache_key(email), decision.action,
+                 decision.confidence, decision.reasoning)
+            )
+    
+    def classify_email_ai(self, email: EmailItem, pref_context: Optional[str] = None) -> TriageDecision:
         """Use AI to classify email"""
-        if not HAS_OPENAI or not self.config.get('openai_api_key'):
-            return self.classify_email_rules(email)
+        return self._request_ai_classification(email, pref_context) or self.classify_email_rules(email)
+    
+    def _request_ai_classification(self, email: EmailItem,
+                                   pref_context: Optional[str] = None) -> Optional[TriageDecision]:
+        """Cached or fresh OpenAI classification; None if AI is disabled or the request fails"""
+        if not self._ai_enabled:
+            return None
+        
+        cached = self._get_cached_classification(email)
+        if cached:
+            return cached
         
         try:
-            client = openai.OpenAI(api_key=self.config['openai_api_key'])
+            client = self._get_openai_client()
             
             # Get existing preferences for context
-            preferences = self.get_learned_preferences()
-            pref_context = "\n".join([
-                f"- {p.pattern_type}:{p.pattern_value} → {p.action} (confidence: {p.confidence:.2f})"
-                for p in preferences[:10]  # Top 10 most confident
-            ])
+            if pref_context is None:
+                pref_context = self._preference_context()
             
-            prompt = f"""
-You are an email triage assistant. Classify this email into one of three categories:
-1. "trash" - Marketing, spam, newsletters, notifications that can be safely ignored/archived
-2. "revisit" - Might be important but not urgent, review later when inbox is clean
-3. "action_needed" - Requires immediate human attention, response, or action
-
-Email Details:
-- Sender: {email.sender}
-- Subject: {email.subject}
-- Snippet: {email.snippet}
-- Has unsubscribe link: {email.has_unsubscribe}
-
-Learned Preferences (for context):
-{pref_context}
-
-Respond with JSON:
-{{
-    "action": "trash|revisit|action_needed",
-    "confidence": 0.0-1.0,
-    "reasoning": "brief explanation",
-    "suggested_rule": "optional rule for future similar emails"
-}}
-"""
+            prompt = (
+                f"Sender: {email.sender}\n"
+                f"Subject: {email.subject}\n"
+                f"Snippet: {email.snippet}\n"
+                f"Has unsubscribe link: {email.has_unsubscribe}\n"
+                f"Learned preferences:\n{pref_context or '- none'}"
+            )
             
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            response = client.with_options(timeout=self._ai_timeout).chat.completions.create(
+                model=self._ai_model,
+                messages=[
+                    {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=120,
                 temperature=0.1
             )
             
             result = json.loads(response.choices[0].message.content)
-            return TriageDecision(
+            decision = TriageDecision(
                 email_id=email.id,
                 action=result['action'],
                 confidence=result['confidence'],
                 reasoning=result['reasoning'],
                 suggested_rule=result.get('suggested_rule')
             )
+            self._cache_classification(email, decision)
+            return decision
             
         except Exception as e:
             print(f"AI classification failed: {e}")
-            return self.classify_email_rules(email)
+            return None
     
     def classify_email_rules(self, email: EmailItem) -> TriageDecision:
         """Classify email using learned rules and heuristics"""
@@ -402,13 +752,13 @@ Respond with JSON:
                 )
         
         # Heuristic classification
-        subject_lower = email.subject.lower()
-        snippet_lower = email.snippet.lower()
-        combined_text = f"{subject_lower} {snippet_lower}"
+        combined_text = f"{email._subject_lower} {email._snippet_lower}"
+        has_important, marketing_score = score_keywords(
+            combined_text, self._important_re, self._marketing_keywords
+        )
         
         # High priority indicators
-        important_keywords = self.config.get('important_keywords', [])
-        if any(keyword in combined_text for keyword in important_keywords):
+        if has_important:
             return TriageDecision(
                 email_id=email.id,
                 action="action_needed",
@@ -417,9 +767,6 @@ Respond with JSON:
             )
         
         # Marketing/newsletter indicators
-        marketing_keywords = self.config.get('marketing_keywords', [])
-        marketing_score = sum(1 for keyword in marketing_keywords if keyword in combined_text)
-        
         if email.has_unsubscribe or marketing_score >= 2:
             return TriageDecision(
                 email_id=email.id,
@@ -438,39 +785,31 @@ Respond with JSON:
     
     def get_matching_preferences(self, email: EmailItem) -> List[UserPreference]:
         """Get preferences that match this email"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        preferences = []
-        
-        # Check sender exact match
-        cursor.execute(
-            "SELECT * FROM preferences WHERE pattern_type='sender' AND pattern_value=?",
-            (email.sender,)
-        )
-        for row in cursor.fetchall():
-            preferences.append(self._row_to_preference(row))
-        
-        # Check domain match
-        cursor.execute(
-            "SELECT * FROM preferences WHERE pattern_type='domain' AND pattern_value=?",
-            (email.sender_domain,)
+        # Sender, domain and subject keyword matches in one round-trip; each arm
+        # is an indexed lookup and UNION ALL keeps the sender > domain > keyword order
+        query = (
+            "SELECT * FROM preferences WHERE pattern_type='sender' AND pattern_value=? "
+            "UNION ALL "
+            "SELECT * FROM preferences WHERE pattern_type='domain' AND pattern_value=?"
         )
-        for row in cursor.fetchall():
-            preferences.append(self._row_to_preference(row))
+        params = [email.sender, email.sender_domain]
         
-        # Check subject keywords
-        subject_words = email.subject.lower().split()
-        for word in subject_words:
-            cursor.execute(
-                "SELECT * FROM preferences WHERE pattern_type='subject_keyword' AND pattern_value=?",
-                (word,)
+        subject_words = list(dict.fromkeys(email._subject_tokens))
+        if subject_words:
+            placeholders = ",".join("?" * len(subject_words))
+            query += (
+                " UNION ALL "
+                "SELECT * FROM preferences WHERE pattern_type='subject_keyword' "
+                f"AND pattern_value IN ({placeholders})"
             )
-            for row in cursor.fetchall():
-                preferences.append(self._row_to_preference(row))
+            params.extend(subject_words)
+        
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         
-        conn.close()
-        return preferences
+        return [self._row_to_preference(row) for row in rows]
     
     def _row_to_preference(self, row) -> UserPreference:
         """Convert database row to UserPreference"""
@@ -485,116 +824,110 @@ Respond with JSON:
     
     def get_learned_preferences(self) -> List[UserPreference]:
         """Get all learned preferences, sorted by confidence"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT * FROM preferences ORDER BY confidence DESC, usage_count DESC"
-        )
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            cursor.execute(
+                "SELECT * FROM preferences ORDER BY confidence DESC, usage_count DESC"
+            )
+            rows = cursor.fetchall()
         
-        preferences = [self._row_to_preference(row) for row in cursor.fetchall()]
-        conn.close()
-        return preferences
+        return [self._row_to_preference(row) for row in rows]
     
     def learn_from_decision(self, email: EmailItem, decision: TriageDecision, user_confirmed: bool):
         """Learn from user decision to improve future classifications"""
         if not user_confirmed:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Record the decision
-        cursor.execute('''
-            INSERT INTO decisions (email_id, sender, subject, action, reasoning, was_auto_decided)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (email.id, email.sender, email.subject, decision.action, 
-              decision.reasoning, decision.confidence > self.config.get('auto_decide_threshold', 0.85)))
-        
-        # Learn patterns
-        patterns_to_learn = [
-            ('sender', email.sender),
-            ('domain', email.sender_domain),
-        ]
+        self.learn_from_decisions_batch([(email, decision)])
+    
+    def learn_from_decisions_batch(self, pairs: List[Tuple[EmailItem, TriageDecision]]):
+        """Learn from several confirmed decisions in a single transaction"""
+        if not pairs:
+            return
         
-        # Learn from subject keywords
-        subject_words = [word.lower() for word in email.subject.split() if len(word) > 3]
-        for word in subject_words[:3]:  # Top 3 meaningful words
-            patterns_to_learn.append(('subject_keyword', word))
+        decision_rows = []
+        pattern_rows = []
         
-        for pattern_type, pattern_value in patterns_to_learn:
-            cursor.execute('''
-                INSERT OR REPLACE INTO preferences 
-                (pattern_type, pattern_value, action, confidence, usage_count)
-                VALUES (?, ?, ?, 
-                    COALESCE((SELECT confidence FROM preferences 
-                             WHERE pattern_type=? AND pattern_value=? AND action=?) + 0.1, 0.6),
-                    COALESCE((SELECT usage_count FROM preferences 
-                             WHERE pattern_type=? AND pattern_value=? AND action=?) + 1, 1)
-                )
-            ''', (pattern_type, pattern_value, decision.action,
-                  pattern_type, pattern_value, decision.action,
-                  pattern_type, pattern_value, decision.action))
+        for email, decision in pairs:
+            decision_rows.append((email.id, email.sender, email.subject, decision.action,
+                                  decision.reasoning, decision.confidence > self._auto_threshold))
+            
+            # Learn patterns
+            patterns_to_learn = [
+                ('sender', email.sender),
+                ('domain', email.sender_domain),
+            ]
+            
+            # Learn from subject keywords
+            subject_words = [word for word in email._subject_tokens if len(word) > 3]
+            for word in subject_words[:3]:  # Top 3 meaningful words
+                patterns_to_learn.append(('subject_keyword', word))
+            
+            for pattern_type, pattern_value in patterns_to_learn:
+                pattern_rows.append((pattern_type, pattern_value, decision.action))
         
-        conn.commit()
-        conn.close()
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            # Take the write lock up front so the batch commits with one WAL sync
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.executemany(INSERT_DECISION_SQL, decision_rows)
+                cursor.executemany(UPSERT_PREFERENCE_SQL, pattern_rows)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
     
-    def process_batch(self, emails: List[EmailItem]) -> List[Tuple[EmailItem, TriageDecision]]:
-        """Process a batch of emails and return decisions"""
+    def process_batch(self, emails: List[EmailItem],
+                      decisions: Optional[List[TriageDecision]] = None) -> List[Tuple[EmailItem, TriageDecision]]:
+        """Process a batch of emails and return decisions
+        
+        decisions may hold suggestions already computed by classify_emails_ai.
+        """
         results = []
         auto_decisions = []
         manual_decisions = []
+        action_counts = Counter()
+        high_confidence = 0
         
         print(f"\n📧 Processing {len(emails)} emails...")
         
-        for email in emails:
-            decision = self.classify_email_ai(email)
-            
-            if decision.confidence >= self.config.get('auto_decide_threshold', 0.85):
+        if decisions is None:
+            decisions = self.classify_emails_ai(emails)
+        threshold = self._auto_threshold
+        # One pass splits auto/manual and tallies the auto summary
+        for email, decision in zip(emails, decisions):
+            if decision.confidence >= threshold:
                 auto_decisions.append((email, decision))
+                action_counts[decision.action] += 1
+                if decision.confidence >= 0.95:
+                    high_confidence += 1
             else:
                 manual_decisions.append((email, decision))
         
         # Handle auto-decisions
         if auto_decisions:
-            # Create summary by action and confidence
-            action_summary = {}
-            confidence_levels = {"high": 0, "medium": 0}
-            
-            for email, decision in auto_decisions:
-                action = decision.action
-                if action not in action_summary:
-                    action_summary[action] = []
-                action_summary[action].append((email, decision))
-                
-                # Count confidence levels
-                if decision.confidence >= 0.95:
-                    confidence_levels["high"] += 1
-                else:
-                    confidence_levels["medium"] += 1
-            
             print(f"\n🤖 {len(auto_decisions)} emails ready for auto-processing:")
             
             # Show summary by action
-            action_icons = {"trash": "🗑️", "revisit": "⏰", "action_needed": "⚡"}
-            for action, items in action_summary.items():
-                action_name = action.replace('_', ' ').title()
-                icon = action_icons.get(action, "📧")
-                print(f"  {icon} {len(items)} emails → {action_name}")
+            for action, count in action_counts.items():
+                icon = ACTION_ICONS.get(action, "📧")
+                print(f"  {icon} {count} emails → {ACTION_NAMES.get(action) or action.replace('_', ' ').title()}")
             
             # Show confidence breakdown
+            medium_confidence = len(auto_decisions) - high_confidence
             conf_msg = []
-            if confidence_levels["high"] > 0:
-                conf_msg.append(f"{confidence_levels['high']} above 95% confident")
-            if confidence_levels["medium"] > 0:
-                conf_msg.append(f"{confidence_levels['medium']} above 85% confident")
+            if high_confidence > 0:
+                conf_msg.append(f"{high_confidence} above 95% confident")
+            if medium_confidence > 0:
+                conf_msg.append(f"{medium_confidence} above 85% confident")
             
             if conf_msg:
                 print(f"  📊 Confidence: {', '.join(conf_msg)}")
             
             if self.confirm_batch_action("Apply these automatic decisions?"):
+                self.learn_from_decisions_batch(auto_decisions)
                 for email, decision in auto_decisions:
-                    self.learn_from_decision(email, decision, True)
                     self.session_stats[decision.action] += 1
                     self.session_stats['auto_decided'] += 1
                 results.extend(auto_decisions)
@@ -602,7 +935,10 @@ Respond with JSON:
                 manual_decisions.extend(auto_decisions)
         
         # Handle manual decisions
-        for email, decision in manual_decisions:
+        for index, (email, decision) in enumerate(manual_decisions):
+            # Render the next email's speech while the user decides on this one
+            if self._prewarm_next_speech and self.tts_manager and index + 1 < len(manual_decisions):
+                self.tts_manager.prewarm(self._staged_speech_texts(*manual_decisions[index + 1])[1:])
             confirmed_decision = self.get_user_decision(email, decision)
             if confirmed_decision:
                 self.learn_from_decision(email, confirmed_decision, True)
@@ -617,78 +953,80 @@ Respond with JSON:
         print(f"\n" + "="*80)
         print(f"📧 Email from: {email.sender}")
         print(f"📝 Subject: {email.subject}")
-        print(f"📄 Preview: {email.snippet[:200]}...")
+        print(f"📄 Preview: {truncate(email.snippet, 200)}")
         if email.has_unsubscribe:
             print(f"🔗 Has unsubscribe link")
         print(f"🤖 AI suggests: {suggested_decision.action} (confidence: {suggested_decision.confidence:.2f})")
         print(f"💭 Reasoning: {suggested_decision.reasoning}")
         
         # Start text-to-speech with AI suggestion first
-        if self.config.get('enable_tts', True):
+        if self._tts_enabled:
             self._speak_email_details_staged(email, suggested_decision)
         
-        while True:
-            print(f"\nChoose action:")
-            print(f"")
-            print(f"  [9] 🗑️  Trash/Archive")
-            print(f"")
-            print(f"  [5] ⏰ Revisit Later") 
-            print(f"")
-            print(f"  [1] ⚡ Action Needed")
-            print(f"")
-            print(f"  [Space] ❌ Reject AI suggestion")
-            print(f"  [Enter] ✅ Accept AI suggestion ({suggested_decision.action})")
-            print(f"")
-            print(f"  [0] 🚫 Opt-out (Data Erasure Request)")
-            print(f"  [-] 📚 Mark as read & archive all from sender (same subject)")
-            print(f"")
-            print(f"  [q] 🚪 Quit session")
-            print(f"\nPress any key (no Enter needed)...")
-            
-            # Get single keypress
-            choice = getch()
-            
-            # Handle special keys
-            if ord(choice) == 13:  # Enter key
-                choice = 'enter'
-            elif ord(choice) == 32:  # Space key
-                choice = 'space'
-            elif choice == '0':  # Numpad 0 or regular 0
-                choice = 'opt_out'
-            elif choice == '-':  # Numpad minus or regular minus
-                choice = 'bulk_archive'
-            else:
-                choice = choice.lower()
-            
-            print(f"Choice: {choice}")  # Show what was pressed
-            
-            # Interrupt any ongoing speech when user makes a decision
-            if self.tts_manager and hasattr(self.tts_manager, 'interrupt_current_speech'):
-                self.tts_manager.interrupt_current_speech()
-            
-            if choice == 'enter':
-                return suggested_decision
-            elif choice == '9':
-                return TriageDecision(email.id, 'trash', 1.0, 'User decision')
-            elif choice == '5':
-                return TriageDecision(email.id, 'revisit', 1.0, 'User decision')
-            elif choice == '1':
-                return TriageDecision(email.id, 'action_needed', 1.0, 'User decision')
-            elif choice == 'space':
-                # Reject AI suggestion, continue to manual review
-                continue
-            elif choice == 'opt_out':
-                return self._handle_opt_out(email)
-            elif choice == 'bulk_archive':
-                return self._handle_bulk_archive(email)
-            elif choice == 'q':
-                # Interrupt speech before quitting
+        with raw_stdin():
+            while True:
+                print(f"\nChoose action:")
+                print(f"")
+                print(f"  [9] 🗑️  Trash/Archive")
+                print(f"")
+                print(f"  [5] ⏰ Revisit Later") 
+                print(f"")
+                print(f"  [1] ⚡ Action Needed")
+                print(f"")
+                print(f"  [Space] ❌ Reject AI suggestion")
+                print(f"  [Enter] ✅ Accept AI suggestion ({suggested_decision.action})")
+                print(f"")
+                print(f"  [0] 🚫 Opt-out (Data Erasure Request)")
+                print(f"  [-] 📚 Mark as read & archive all from sender (same subject)")
+                print(f"")
+                print(f"  [q] 🚪 Quit session")
+                print(f"\nPress any key (no Enter needed)...")
+                
+                # Get single keypress
+                choice = getch()
+                
+                # Handle special keys
+                if ord(choice) == 13:  # Enter key
+                    choice = 'enter'
+                elif ord(choice) == 32:  # Space key
+                    choice = 'space'
+                elif choice == '0':  # Numpad 0 or regular 0
+                    choice = 'opt_out'
+                elif choice == '-':  # Numpad minus or regular minus
+                    choice = 'bulk_archive'
+                else:
+                    choice = choice.lower()
+                
+                print(f"Choice: {choice}")  # Show what was pressed
+                
+                # Interrupt any ongoing speech when user makes a decision
+                self._cancel_pending_speech()
                 if self.tts_manager and hasattr(self.tts_manager, 'interrupt_current_speech'):
                     self.tts_manager.interrupt_current_speech()
-                self.print_session_stats()
-                exit(0)
-            else:
-                print(f"Invalid choice '{choice}'. Please try again.")
+                
+                if choice == 'enter':
+                    return suggested_decision
+                elif choice == '9':
+                    return TriageDecision(email.id, 'trash', 1.0, 'User decision')
+                elif choice == '5':
+                    return TriageDecision(email.id, 'revisit', 1.0, 'User decision')
+                elif choice == '1':
+                    return TriageDecision(email.id, 'action_needed', 1.0, 'User decision')
+                elif choice == 'space':
+                    # Reject AI suggestion, continue to manual review
+                    continue
+                elif choice == 'opt_out':
+                    return self._handle_opt_out(email)
+                elif choice == 'bulk_archive':
+                    return self._handle_bulk_archive(email)
+                elif choice == 'q':
+                    # Interrupt speech before quitting
+                    if self.tts_manager and hasattr(self.tts_manager, 'interrupt_current_speech'):
+                        self.tts_manager.interrupt_current_speech()
+                    self.print_session_stats()
+                    exit(0)
+                else:
+                    print(f"Invalid choice '{choice}'. Please try again.")
     
     def _handle_opt_out(self, email: EmailItem) -> TriageDecision:
         """Handle opt-out request for an email"""
@@ -757,17 +1095,18 @@ Respond with JSON:
     
     def confirm_batch_action(self, message: str) -> bool:
         """Get yes/no confirmation from user"""
-        while True:
-            print(f"{message} [y/n] (single keypress): ", end='', flush=True)
-            choice = getch().lower()
-            print(choice)  # Echo the choice
-            
-            if choice in ['y']:
-                return True
-            elif choice in ['n']:
-                return False
-            else:
-                print(f"Invalid choice '{choice}'. Please press 'y' or 'n'")
+        with raw_stdin():
+            while True:
+                print(f"{message} [y/n] (single keypress): ", end='', flush=True)
+                choice = getch().lower()
+                print(choice)  # Echo the choice
+                
+                if choice in ['y']:
+                    return True
+                elif choice in ['n']:
+                    return False
+                else:
+                    print(f"Invalid choice '{choice}'. Please press 'y' or 'n'")
     
     def send_unsubscribe_request(self, email: EmailItem) -> bool:
         """Send unsubscribe request if available"""
@@ -779,14 +1118,13 @@ Respond with JSON:
             return False
         
         # Check if domain is whitelisted (don't auto-unsubscribe from important services)
-        whitelist = self.config.get('unsubscribe_domains_whitelist', [])
-        if any(domain in email.sender_domain for domain in whitelist):
+        if any(domain in email.sender_domain for domain in self._whitelist_tuple):
             print(f"⚠️  Skipping auto-unsubscribe for whitelisted domain: {email.sender_domain}")
             return False
         
         try:
-            # Simple GET request to unsubscribe link
-            response = requests.get(email.unsubscribe_link, timeout=10)
+            # Simple GET request to unsubscribe link over the pooled session
+            response = self._http.get(email.unsubscribe_link, timeout=10)
             if response.status_code == 200:
                 print(f"✅ Unsubscribe request sent to {email.sender_domain}")
                 return True
@@ -5,10 +5,22 @@ Simple, direct integration with Gmail API using OAuth
 """
 
 import json
+import logging
 import os
 import pickle
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from pathlib import Path
 
 # Gmail API imports
@@ -17,11 +29,30 @@ try:
     from google.oauth2.credentials import Credentials
     from google_auth_oauthlib.flow import InstalledAppFlow
     from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    import google_auth_httplib2
+    import httplib2
     HAS_GMAIL_API = True
 except ImportError:
     HAS_GMAIL_API = False
 
-from email_triage_system import EmailItem, EmailTriageSystem, TriageDecision
+# Faster (C) JSON for the on-disk message cache when available
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from email_triage_system import EmailItem, EmailTriageSystem, TriageDecision, truncate
+
+# Inbox messages that have not been triaged yet
+INBOX_TRIAGE_QUERY = "in:inbox -label:TRIAGE_REVISIT -label:TRIAGE_ACTION_NEEDED -label:TRIAGE_OPT_OUT"
+
+# Fetched batches waiting for triage; bounds how far fetching runs ahead
+PREFETCH_BATCHES = 2
+
+# Per-message progress and errors go through logging; configured in main()
+log = logging.getLogger(__name__)
 
 # Gmail API scopes
 SCOPES = [
@@ -30,10 +61,199 @@ SCOPES = [
     'https://www.googleapis.com/auth/gmail.labels'
 ]
 
+# Triage only reads these headers, so messages are fetched as metadata
+METADATA_HEADERS = ['From', 'Subject', 'List-Unsubscribe']
+WANTED_HEADERS = frozenset(name.lower() for name in METADATA_HEADERS)
+MESSAGE_FIELDS = 'id,threadId,labelIds,snippet,internalDate,payload/headers'
+
+# Largest page messages.list returns
+LIST_PAGE_SIZE = 500
+
+# Maximum number of calls Gmail accepts in one batch request
+GMAIL_BATCH_SIZE = 100
+
+# Maximum number of message ids messages.batchModify accepts per call
+BATCH_MODIFY_SIZE = 1000
+
+# URL inside a List-Unsubscribe header, e.g. <https://example.com/unsub>
+_UNSUB_URL_RE = re.compile(r'<(https?://[^>]+)>')
+
+# Reply/forward prefix stripped from subjects before searching
+_REPLY_PREFIX_RE = re.compile(r'^(?:Re|Fwd|Fw):\s*', re.I)
+
+# In-process cache for message metadata and thread sizes
+API_CACHE_SIZE = 4096
+API_CACHE_TTL = 300  # seconds
+
+# Socket timeout for Gmail HTTP connections
+GMAIL_HTTP_TIMEOUT = 30  # seconds
+
+# Worker threads for re-fetching messages a batch request failed to return
+FALLBACK_FETCH_WORKERS = 10
+
+# Transient Gmail errors are retried with exponential backoff and jitter
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+MAX_BACKOFF = 32  # seconds
+
+# After this many consecutive failed calls, fail fast for a while
+CIRCUIT_FAIL_MAX = 5
+CIRCUIT_RESET_TIMEOUT = 30  # seconds
+
+# Custom labels used by triage; Gmail modify calls need their ids, not names
+TRIAGE_LABELS = ['TRIAGE_REVISIT', 'TRIAGE_ACTION_NEEDED', 'TRIAGE_OPT_OUT']
+
+# Re-list labels at least daily in case they were renamed or deleted in Gmail
+LABEL_CACHE_MAX_AGE = 24 * 60 * 60  # seconds
+
+# Credentials file written by earlier versions; migrated to token.json on first run
+LEGACY_TOKEN_FILE = "token.pickle"
+
+# HTTP statuses from a modify call that suggest a cached label id is stale
+STALE_LABEL_STATUSES = (400, 404)
+
+def _new_service(creds):
+    """Build a Gmail service on its own keep-alive HTTP connection"""
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=GMAIL_HTTP_TIMEOUT))
+    return build('gmail', 'v1', http=http, cache_discovery=False, static_discovery=True)
+
+
+@lru_cache(maxsize=4)
+def _build_service(creds_json: str):
+    """Build (once per credential set) a Gmail service from the bundled discovery document"""
+    return _new_service(Credentials.from_authorized_user_info(json.loads(creds_json), SCOPES))
+
+
+def _json_dumps(obj) -> str:
+    """Serialize a cached message (orjson when installed)"""
+    return orjson.dumps(obj).decode() if HAS_ORJSON else json.dumps(obj)
+
+
+def _json_loads(data: str):
+    """Parse a cached message (orjson when installed)"""
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+def _history_message_ids(record: Dict) -> Iterator[str]:
+    """Ids of every message a Gmail history record touches (added, deleted or relabelled)"""
+    for message in record.get('messages', []):
+        yield message['id']
+    for kind in ('messagesAdded', 'messagesDeleted', 'labelsAdded', 'labelsRemoved'):
+        for change in record.get(kind, []):
+            yield change['message']['id']
+
+
+def _find_text_body(payload: Dict) -> str:
+    """Return the base64url data of the first text/plain part, without decoding it"""
+    if payload.get('mimeType') == 'text/plain':
+        return payload.get('body', {}).get('data', '')
+    for part in payload.get('parts', []):
+        data = _find_text_body(part)
+        if data:
+            return data
+    return ''
+
+
+class _MessageStore:
+    """On-disk message metadata cache, kept current with Gmail history deltas"""
+    
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS messages (id TEXT PRIMARY KEY, json TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    
+    def get_many(self, message_ids: List[str]) -> Dict[str, Dict]:
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for message_id, data in self._conn.execute(
+                    f"SELECT id, json FROM messages WHERE id IN ({placeholders})", chunk
+                ):
+                    found[message_id] = _json_loads(data)
+        return found
+    
+    def put_many(self, messages: Dict[str, Dict]):
+        if not messages:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (id, json) VALUES (?, ?)",
+                [(message_id, _json_dumps(message)) for message_id, message in messages.items()]
+            )
+    
+    def discard_many(self, message_ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM messages WHERE id = ?", [(i,) for i in message_ids])
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages")
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class GmailCircuitOpenError(Exception):
+    """Raised instead of calling Gmail while repeated failures have opened the circuit"""
+
+
+class _TTLCache:
+    """Small LRU cache whose entries expire after a fixed number of seconds"""
+    
+    def __init__(self, maxsize: int = API_CACHE_SIZE, ttl: float = API_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
 class GmailOAuthClient:
     """Direct Gmail OAuth client"""
     
-    def __init__(self, credentials_file: str = "credentials.json", token_file: str = "token.pickle"):
+    def __init__(self, credentials_file: str = "credentials.json", token_file: str = "token.json"):
         if not HAS_GMAIL_API:
             print("❌ Gmail API libraries not installed")
             print("Install with: pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client")
@@ -41,7 +261,18 @@ class GmailOAuthClient:
         
         self.credentials_file = credentials_file
         self.token_file = token_file
-        self.service = None
+        self.labels_cache_file = Path(token_file).with_name("labels_cache.json")
+        self._message_store = _MessageStore(str(Path(token_file).with_name("message_cache.db")))
+        self._service = None
+        self._owner_thread = threading.get_ident()
+        self._message_cache = _TTLCache()
+        self._thread_count_cache = _TTLCache()
+        # Circuit-breaker state, shared by the fetch pool threads
+        self._circuit_lock = threading.Lock()
+        self._failure_streak = 0
+        self._circuit_open_until = 0.0
+        self._creds = None
+        self._thread_local = threading.local()
         self._authenticate()
     
     def _authenticate(self):
@@ -49,9 +280,11 @@ class GmailOAuthClient:
         creds = None
         
         # Load existing token
+        if not os.path.exists(self.token_file):
+            self._migrate_legacy_token()
         if os.path.exists(self.token_file):
-            with open(self.token_file, 'rb') as token:
-                creds = pickle.load(token)
+            with open(self.token_file, 'r') as token:
+                creds = Credentials.from_authorized_user_info(json.load(token), SCOPES)
         
         # If no valid credentials, get new ones
         if not creds or not creds.valid:
@@ -74,77 +307,344 @@ class GmailOAuthClient:
                 creds = flow.run_local_server(port=0)
             
             # Save credentials for next run
-            with open(self.token_file, 'wb') as token:
-                pickle.dump(creds, token)
+            with open(self.token_file, 'w') as token:
+                token.write(creds.to_json())
         
         # Build Gmail service
-        self.service = build('gmail', 'v1', credentials=creds)
+        self._creds = creds
+        self.service = _build_service(creds.to_json())
         print("✅ Gmail OAuth authentication successful")
     
-    def list_messages(self, query: str = "in:inbox", max_results: int = 100) -> List[Dict]:
-        """List messages from Gmail"""
+    def _migrate_legacy_token(self):
+        """Rewrite credentials pickled by earlier versions as token.json, so users needn't sign in again"""
+        legacy_file = Path(self.token_file).with_name(LEGACY_TOKEN_FILE)
+        if not legacy_file.exists():
+            return
         try:
-            result = self.service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=max_results
-            ).execute()
+            with open(legacy_file, 'rb') as token:
+                creds = pickle.load(token)
+            with open(self.token_file, 'w') as token:
+                token.write(creds.to_json())
+        except Exception as e:
+            print(f"⚠️  Could not migrate {legacy_file}, signing in again: {e}")
+            return
+        print(f"🔁 Migrated Gmail credentials from {legacy_file} to {self.token_file}")
+    
+    @property
+    def service(self):
+        """Gmail service for the calling thread (service objects are not thread-safe)"""
+        if threading.get_ident() == self._owner_thread:
+            return self._service
+        return self._thread_service()
+    
+    @service.setter
+    def service(self, value):
+        self._service = value
+    
+    def _execute(self, request):
+        """Execute a Gmail request or batch, retrying transient errors"""
+        if time.monotonic() < self._circuit_open_until:
+            raise GmailCircuitOpenError("Gmail calls paused after repeated failures")
+        
+        attempt = 0
+        while True:
+            try:
+                response = request.execute()
+            except HttpError as e:
+                if e.resp.status not in RETRYABLE_STATUSES:
+                    # Client errors say nothing about Gmail's health
+                    raise
+                if attempt < MAX_RETRIES:
+                    time.sleep(self._retry_delay(e, attempt))
+                    attempt += 1
+                    continue
+                self._record_failure()
+                raise
+            except Exception:
+                self._record_failure()
+                raise
             
-            messages = result.get('messages', [])
-            print(f"📧 Found {len(messages)} messages")
-            return messages
+            with self._circuit_lock:
+                self._failure_streak = 0
+            return response
+    
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying; a Retry-After header takes precedence"""
+        retry_after = error.resp.get('retry-after')
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF)
+            except ValueError:
+                pass  # HTTP-date form; fall back to exponential backoff
+        return min(2 ** attempt + random.random(), MAX_BACKOFF)
+    
+    def _record_failure(self):
+        """Count a failed call and open the circuit after too many in a row"""
+        with self._circuit_lock:
+            self._failure_streak += 1
+            if self._failure_streak < CIRCUIT_FAIL_MAX:
+                return
+            self._circuit_open_until = time.monotonic() + CIRCUIT_RESET_TIMEOUT
+            self._failure_streak = 0
+        print(f"⚠️  Gmail failed {CIRCUIT_FAIL_MAX} times in a row, pausing calls for {CIRCUIT_RESET_TIMEOUT}s")
+    
+    def iter_messages(self, query: str = "in:inbox", page_size: int = LIST_PAGE_SIZE) -> Iterator[Dict]:
+        """Yield message stubs page by page, following nextPageToken"""
+        messages_api = self.service.users().messages()
+        request = messages_api.list(userId='me', q=query, maxResults=min(page_size, LIST_PAGE_SIZE))
+        
+        while request is not None:
+            try:
+                response = self._execute(request)
+            except Exception as e:
+                print(f"❌ Error listing messages: {e}")
+                return
             
-        except Exception as e:
-            print(f"❌ Error listing messages: {e}")
-            return []
+            yield from response.get('messages', [])
+            request = messages_api.list_next(request, response)
+    
+    def list_messages(self, query: str = "in:inbox", max_results: int = 100) -> List[Dict]:
+        """List messages from Gmail"""
+        messages = list(islice(self.iter_messages(query, page_size=max_results), max_results))
+        print(f"📧 Found {len(messages)} messages")
+        return messages
+    
+    def _message_request(self, message_id: str, format: str = 'metadata',
+                         metadata_headers: List[str] = None, fields: Optional[str] = None):
+        """Build a messages.get request; metadata format returns headers only
+        
+        fields defaults to MESSAGE_FIELDS for metadata and to no mask otherwise,
+        so format='full' keeps the message body.
+        """
+        params = {'userId': 'me', 'id': message_id, 'format': format}
+        if format == 'metadata':
+            params['metadataHeaders'] = metadata_headers or METADATA_HEADERS
+            fields = fields or MESSAGE_FIELDS
+        if fields:
+            params['fields'] = fields
+        return self.service.users().messages().get(**params)
     
-    def get_message(self, message_id: str) -> Dict:
-        """Get full message details"""
+    def get_message(self, message_id: str, format: str = 'metadata',
+                    metadata_headers: List[str] = None, fields: Optional[str] = None) -> Dict:
+        """Get message details (headers only unless format='full')"""
+        # Only the default metadata view is cached
+        cacheable = format == 'metadata' and metadata_headers is None and fields in (None, MESSAGE_FIELDS)
+        if cacheable:
+            cached = self._message_cache.get(message_id) or self._message_store.get_many([message_id]).get(message_id)
+            if cached is not None:
+                self._message_cache.set(message_id, cached)
+                return cached
+        
         try:
-            message = self.service.users().messages().get(
-                userId='me',
-                id=message_id,
-                format='full'
-            ).execute()
+            message = self._execute(self._message_request(message_id, format, metadata_headers, fields))
+            if cacheable:
+                self._message_cache.set(message_id, message)
+                self._message_store.put_many({message_id: message})
             return message
             
         except Exception as e:
-            print(f"❌ Error getting message {message_id}: {e}")
+            log.warning("❌ Error getting message %s: %s", message_id, e)
             return {}
     
+    def get_messages_batch(self, message_ids: List[str]) -> Dict[str, Dict]:
+        """Get message metadata for many messages via Gmail's batch endpoint"""
+        # One batch request carries up to 100 gets over a single connection; only
+        # messages the batch failed to return are re-fetched on worker threads.
+        messages = {}
+        missing = []
+        # Batch request ids must be unique, so each id is requested once
+        for message_id in dict.fromkeys(message_ids):
+            cached = self._message_cache.get(message_id)
+            if cached is not None:
+                messages[message_id] = cached
+            else:
+                missing.append(message_id)
+        
+        # Then the on-disk cache, which history sync keeps current between runs
+        if missing:
+            stored = self._message_store.get_many(missing)
+            for message_id, message in stored.items():
+                messages[message_id] = message
+                self._message_cache.set(message_id, message)
+            missing = [message_id for message_id in missing if message_id not in stored]
+        
+        fetched = {}
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                log.warning("❌ Error getting message %s: %s", request_id, exception)
+            else:
+                fetched[request_id] = response
+        
+        for start in range(0, len(missing), GMAIL_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for message_id in missing[start:start + GMAIL_BATCH_SIZE]:
+                batch.add(self._message_request(message_id), request_id=message_id)
+            
+            try:
+                self._execute(batch)
+            except Exception as e:
+                print(f"❌ Error executing message batch: {e}")
+        
+        failed = [message_id for message_id in missing if message_id not in fetched]
+        if failed:
+            for message_id, message in self._get_messages_threaded(failed):
+                if message:
+                    fetched[message_id] = message
+        
+        for message_id, message in fetched.items():
+            self._message_cache.set(message_id, message)
+        self._message_store.put_many(fetched)
+        messages.update(fetched)
+        
+        return messages
+    
+    def _thread_service(self):
+        """Gmail service owned by the current worker thread"""
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            service = _new_service(self._creds)
+            self._thread_local.service = service
+        return service
+    
+    def _get_messages_threaded(self, message_ids: List[str]) -> List[Tuple[str, Dict]]:
+        """Fetch messages one request each, spread over a bounded thread pool"""
+        def fetch(message_id):
+            try:
+                return message_id, self._execute(self._message_request(message_id))
+            except Exception as e:
+                log.warning("❌ Error getting message %s: %s", message_id, e)
+                return message_id, {}
+        
+        with ThreadPoolExecutor(max_workers=min(FALLBACK_FETCH_WORKERS, len(message_ids))) as executor:
+            return list(executor.map(fetch, message_ids))
+    
+    def get_thread_message_counts(self, thread_ids: List[str]) -> Dict[str, int]:
+        """Count messages per thread via Gmail's batch endpoint"""
+        counts = {}
+        unique_ids = []
+        for thread_id in dict.fromkeys(thread_ids):
+            cached = self._thread_count_cache.get(thread_id)
+            if cached is not None:
+                counts[thread_id] = cached
+            else:
+                unique_ids.append(thread_id)
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                log.warning("❌ Error getting thread %s: %s", request_id, exception)
+            else:
+                counts[request_id] = len(response.get('messages', []))
+                self._thread_count_cache.set(request_id, counts[request_id])
+        
+        for start in range(0, len(unique_ids), GMAIL_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for thread_id in unique_ids[start:start + GMAIL_BATCH_SIZE]:
+                batch.add(
+                    self.service.users().threads().get(
+                        userId='me',
+                        id=thread_id,
+                        format='minimal',
+                        fields='id,messages/id'
+                    ),
+                    request_id=thread_id
+                )
+            
+            try:
+                self._execute(batch)
+            except Exception as e:
+                print(f"❌ Error executing thread batch: {e}")
+        
+        return counts
+    
     def modify_message(self, message_id: str, add_labels: List[str] = None, remove_labels: List[str] = None):
         """Modify message labels"""
+        self._forget_messages([message_id])
         try:
             body = {
                 'addLabelIds': add_labels or [],
                 'removeLabelIds': remove_labels or []
             }
             
-            result = self.service.users().messages().modify(
+            result = self._execute(self.service.users().messages().modify(
                 userId='me',
                 id=message_id,
                 body=body
-            ).execute()
+            ))
             
             return result
             
         except Exception as e:
-            print(f"❌ Error modifying message {message_id}: {e}")
+            log.warning("❌ Error modifying message %s: %s", message_id, e)
+            self._check_stale_labels(e)
             return {}
     
+    def batch_modify_messages(self, message_ids: List[str], add_labels: List[str] = None,
+                              remove_labels: List[str] = None) -> bool:
+        """Apply the same label change to many messages with messages.batchModify"""
+        modified = self.batch_modify_label_groups([(message_ids, add_labels, remove_labels)])
+        return modified == len(message_ids)
+    
+    def batch_modify_label_groups(self, groups: List[Tuple[List[str], List[str], List[str]]]) -> int:
+        """Send several (message_ids, add_labels, remove_labels) changes in one batch request
+        
+        Returns the number of messages whose label change succeeded.
+        """
+        modify_calls = []
+        for message_ids, add_labels, remove_labels in groups:
+            self._forget_messages(message_ids)
+            for start in range(0, len(message_ids), BATCH_MODIFY_SIZE):
+                modify_calls.append((message_ids[start:start + BATCH_MODIFY_SIZE], add_labels, remove_labels))
+        
+        modified = 0
+        
+        def on_response(request_id, response, exception):
+            nonlocal modified
+            chunk = modify_calls[int(request_id)][0]
+            if exception is not None:
+                log.warning("❌ Error modifying %d messages: %s", len(chunk), exception)
+                self._check_stale_labels(exception)
+            else:
+                modified += len(chunk)
+        
+        for start in range(0, len(modify_calls), GMAIL_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index in range(start, min(start + GMAIL_BATCH_SIZE, len(modify_calls))):
+                chunk, add_labels, remove_labels = modify_calls[index]
+                batch.add(
+                    self.service.users().messages().batchModify(
+                        userId='me',
+                        body={
+                            'ids': chunk,
+                            'addLabelIds': add_labels or [],
+                            'removeLabelIds': remove_labels or []
+                        }
+                    ),
+                    request_id=str(index)
+                )
+            
+            try:
+                self._execute(batch)
+            except Exception as e:
+                print(f"❌ Error executing modify batch: {e}")
+        
+        return modified
+    
     def trash_message(self, message_id: str):
         """Move message to trash"""
+        self._forget_messages([message_id])
         try:
-            result = self.service.users().messages().trash(
+            result = self._execute(self.service.users().messages().trash(
                 userId='me',
                 id=message_id
-            ).execute()
+            ))
             
-            print(f"🗑️ Trashed message {message_id}")
+            log.info("🗑️ Trashed message %s", message_id)
             return result
             
         except Exception as e:
-            print(f"❌ Error trashing message {message_id}: {e}")
+            log.warning("❌ Error trashing message %s: %s", message_id, e)
             return {}
     
     def archive_message(self, message_id: str):
@@ -155,40 +655,25 @@ class GmailOAuthClient:
         """Search for messages by sender and subject, excluding conversations"""
         try:
             # Clean the subject for searching (remove Re:, Fwd:, etc.)
-            clean_subject = subject
-            for prefix in ['Re:', 'RE:', 'Fwd:', 'FWD:', 'Fw:', 'FW:']:
-                if clean_subject.startswith(prefix):
-                    clean_subject = clean_subject[len(prefix):].strip()
+            clean_subject = _REPLY_PREFIX_RE.sub('', subject, count=1).strip()
             
             # Build search query
-            query = f'from:"{sender}" subject:"{clean_subject}"'
+            query = f'from:"{sender}" subject:"{clean_subject}" -is:chat'
             
-            # Get all matching messages
-            result = self.service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=500  # Reasonable limit
-            ).execute()
-            
-            messages = result.get('messages', [])
+            # Get all matching messages, across as many pages as needed
+            messages = list(self.iter_messages(query))
             
             if exclude_conversations:
-                # Filter out messages that are part of conversations (threads with >1 message)
-                single_messages = []
-                for msg in messages:
-                    # Get thread info to check message count
-                    thread_id = msg.get('threadId')
-                    if thread_id:
-                        thread_result = self.service.users().threads().get(
-                            userId='me',
-                            id=thread_id
-                        ).execute()
-                        
-                        # Only include if thread has exactly 1 message (no conversation)
-                        if len(thread_result.get('messages', [])) == 1:
-                            single_messages.append(msg)
+                # Filter out messages that are part of conversations (threads with >1 message).
+                # A thread matched more than once is a conversation without looking it up.
+                matches_per_thread = Counter(msg.get('threadId') for msg in messages)
+                thread_counts = self.get_thread_message_counts(
+                    [thread_id for thread_id, matches in matches_per_thread.items()
+                     if thread_id and matches == 1]
+                )
                 
-                return single_messages
+                # Only include if thread has exactly 1 message (no conversation)
+                return [msg for msg in messages if thread_counts.get(msg.get('threadId')) == 1]
             
             return messages
             
@@ -198,216 +683,381 @@ class GmailOAuthClient:
     
     def mark_as_read(self, message_id: str):
         """Mark message as read"""
+        self._forget_messages([message_id])
         try:
-            result = self.service.users().messages().modify(
+            result = self._execute(self.service.users().messages().modify(
                 userId='me',
                 id=message_id,
                 body={'removeLabelIds': ['UNREAD']}
-            ).execute()
+            ))
             return result
         except Exception as e:
-            print(f"❌ Error marking as read {message_id}: {e}")
+            log.warning("❌ Error marking as read %s: %s", message_id, e)
             return {}
     
-    def create_labels_if_needed(self):
-        """Create triage labels if they don't exist"""
+    def clear_caches(self):
+        """Drop cached message metadata (in memory and on disk) and thread sizes"""
+        self._message_cache.clear()
+        self._message_store.clear()
+        self._thread_count_cache.clear()
+    
+    def _forget_messages(self, message_ids: List[str]):
+        """Drop cached metadata for messages whose labels are about to change"""
+        for message_id in message_ids:
+            self._message_cache.discard(message_id)
+        self._message_store.discard_many(message_ids)
+    
+    def sync_message_cache(self):
+        """Drop cached messages that changed since the last run, using Gmail's history"""
+        try:
+            current_history_id = self._execute(self.service.users().getProfile(userId='me'))['historyId']
+        except Exception as e:
+            # Without a history id the cache can't be checked, so don't trust any of it;
+            # the stored id is kept so the next run also sees this session's changes
+            log.warning("❌ Error reading mailbox history id, clearing message cache: %s", e)
+            self._message_store.clear()
+            return
+        
+        last_history_id = self._message_store.get_meta('history_id')
+        if last_history_id:
+            changed = set()
+            history_api = self.service.users().history()
+            request = history_api.list(userId='me', startHistoryId=last_history_id, maxResults=LIST_PAGE_SIZE)
+            try:
+                while request is not None:
+                    response = self._execute(request)
+                    for record in response.get('history', []):
+                        changed.update(_history_message_ids(record))
+                    request = history_api.list_next(request, response)
+            except Exception as e:
+                # Usually a 404: the stored history id is too old, so start over
+                log.warning("⚠️  Message cache history sync failed, clearing it: %s", e)
+                self._message_store.clear()
+            else:
+                if changed:
+                    self._message_store.discard_many(changed)
+                    print(f"🔄 {len(changed)} cached messages changed since last run")
+        
+        self._message_store.set_meta('history_id', str(current_history_id))
+    
+    def _load_label_cache(self) -> Dict[str, str]:
+        """Load the cached {label name: label id} map, if present and fresh"""
+        try:
+            if time.time() - self.labels_cache_file.stat().st_mtime > LABEL_CACHE_MAX_AGE:
+                return {}
+            with open(self.labels_cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_label_cache(self, label_ids: Dict[str, str]):
+        """Save the {label name: label id} map next to the token file"""
+        try:
+            with open(self.labels_cache_file, 'w') as f:
+                json.dump(label_ids, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not save label cache: {e}")
+    
+    def _check_stale_labels(self, error: Exception):
+        """Drop the label cache when a modify call was rejected, so ids are re-listed next run"""
+        if isinstance(error, HttpError) and error.resp.status in STALE_LABEL_STATUSES:
+            try:
+                self.labels_cache_file.unlink()
+            except OSError:
+                pass
+    
+    def create_labels_if_needed(self, refresh: bool = False) -> Dict[str, str]:
+        """Create triage labels if they don't exist and return their {name: id} map"""
+        if not refresh:
+            cached = self._load_label_cache()
+            if all(label_name in cached for label_name in TRIAGE_LABELS):
+                return cached
+        
         try:
             # Get existing labels
-            labels_result = self.service.users().labels().list(userId='me').execute()
+            labels_result = self._execute(self.service.users().labels().list(userId='me'))
             existing_labels = {label['name']: label['id'] for label in labels_result.get('labels', [])}
             
-            # Labels we need
-            needed_labels = ['TRIAGE_REVISIT', 'TRIAGE_ACTION_NEEDED', 'TRIAGE_OPT_OUT']
-            
-            for label_name in needed_labels:
-                if label_name not in existing_labels:
+            missing_labels = [label_name for label_name in TRIAGE_LABELS if label_name not in existing_labels]
+            if missing_labels:
+                def on_created(request_id, response, exception):
+                    if exception is not None:
+                        print(f"❌ Error creating label {request_id}: {exception}")
+                    else:
+                        existing_labels[request_id] = response['id']
+                
+                # Create all missing labels in one batch request
+                batch = self.service.new_batch_http_request(callback=on_created)
+                for label_name in missing_labels:
                     print(f"📝 Creating label: {label_name}")
                     label_body = {
                         'name': label_name,
                         'labelListVisibility': 'labelShow',
                         'messageListVisibility': 'show'
                     }
-                    
-                    self.service.users().labels().create(
-                        userId='me',
-                        body=label_body
-                    ).execute()
+                    batch.add(self.service.users().labels().create(userId='me', body=label_body),
+                              request_id=label_name)
+                self._execute(batch)
             
-            return True
+            # Only cache a complete map, so a failed create is retried next run
+            if all(label_name in existing_labels for label_name in TRIAGE_LABELS):
+                self._save_label_cache(existing_labels)
+            return existing_labels
             
         except Exception as e:
             print(f"❌ Error creating labels: {e}")
-            return False
+            return {}
 
 
 class SimpleGmailTriageConnector:
     """Simple Gmail triage connector using direct OAuth"""
     
-    def __init__(self, credentials_file: str = "credentials.json"):
+    def __init__(self, credentials_file: str = "credentials.json",
+                 triage_system: Optional[EmailTriageSystem] = None):
         print("🔗 Connecting to Gmail via OAuth...")
         self.gmail_client = GmailOAuthClient(credentials_file)
-        self.triage_system = EmailTriageSystem()
+        # Callers that already hold a triage system share it (and its database connection)
+        self.triage_system = triage_system or EmailTriageSystem()
+        
+        # Create labels if needed (ids come from the on-disk cache when available)
+        label_ids = self.gmail_client.create_labels_if_needed()
         
-        # Create labels if needed
-        self.gmail_client.create_labels_if_needed()
+        # Bring the on-disk message cache up to date with changes made elsewhere
+        self.gmail_client.sync_message_cache()
         
-        # Label mappings
+        # Label mappings (system labels use their names as ids)
         self.labels = {
             'trash': 'TRASH',
-            'revisit': 'TRIAGE_REVISIT',
-            'action_needed': 'TRIAGE_ACTION_NEEDED',
+            'revisit': label_ids.get('TRIAGE_REVISIT', 'TRIAGE_REVISIT'),
+            'action_needed': label_ids.get('TRIAGE_ACTION_NEEDED', 'TRIAGE_ACTION_NEEDED'),
             'spam': 'SPAM',
-            'opt_out': 'TRIAGE_OPT_OUT'
+            'opt_out': label_ids.get('TRIAGE_OPT_OUT', 'TRIAGE_OPT_OUT')
         }
     
+    def clear_caches(self):
+        """Drop the Gmail client's in-process API caches"""
+        self.gmail_client.clear_caches()
+    
     def gmail_to_email_item(self, message_data: Dict) -> EmailItem:
         """Convert Gmail message to EmailItem"""
-        headers = message_data.get('payload', {}).get('headers', [])
+        payload = message_data.get('payload', {})
+        headers = payload.get('headers', [])
         
-        # Extract header values
-        sender = ""
-        subject = ""
-        date_str = ""
-        
-        for header in headers:
+        # Extract header values in one pass, stopping once all wanted headers are seen;
+        # walking backwards keeps the last From and Subject of a repeated header, as before
+        header_map = {}
+        for header in reversed(headers):
             name = header.get('name', '').lower()
-            value = header.get('value', '')
-            
-            if name == 'from':
-                sender = value
-            elif name == 'subject':
-                subject = value
-            elif name == 'date':
-                date_str = value
+            if name in WANTED_HEADERS and name not in header_map:
+                header_map[name] = header.get('value', '')
+                if len(header_map) == len(WANTED_HEADERS):
+                    break
+        sender = header_map.get('from', '')
+        subject = header_map.get('subject', '')
         
         # Get snippet
         snippet = message_data.get('snippet', '')
         
+        # internalDate is Gmail's receive time in epoch milliseconds
+        internal_date = message_data.get('internalDate')
+        if internal_date:
+            timestamp = datetime.fromtimestamp(int(internal_date) / 1000)
+        else:
+            # Date is only a fallback, so it isn't requested or part of the early exit
+            date_header = next((header.get('value', '') for header in reversed(headers)
+                                if header.get('name', '').lower() == 'date'), '')
+            timestamp = self._parse_date_header(date_header)
+        
         # Check for unsubscribe links
-        has_unsubscribe = False
+        unsubscribe_header = header_map.get('list-unsubscribe')
+        has_unsubscribe = unsubscribe_header is not None
         unsubscribe_link = ""
         
-        for header in headers:
-            if header.get('name', '').lower() == 'list-unsubscribe':
-                has_unsubscribe = True
-                # Extract URL from header
-                import re
-                url_match = re.search(r'<(https?://[^>]+)>', header.get('value', ''))
-                if url_match:
-                    unsubscribe_link = url_match.group(1)
-                break
+        if has_unsubscribe:
+            # Extract URL from header
+            url_match = _UNSUB_URL_RE.search(unsubscribe_header)
+            if url_match:
+                unsubscribe_link = url_match.group(1)
         
         return EmailItem(
             id=message_data.get('id', ''),
             sender=sender,
             subject=subject,
             snippet=snippet,
-            timestamp=datetime.now(),  # Could parse date_str for accuracy
+            timestamp=timestamp,
             labels=message_data.get('labelIds', []),
             thread_id=message_data.get('threadId', ''),
             has_unsubscribe=has_unsubscribe,
-            unsubscribe_link=unsubscribe_link
+            unsubscribe_link=unsubscribe_link,
+            raw_body=_find_text_body(payload)  # only present for format='full'
         )
     
+    @staticmethod
+    def _parse_date_header(date_str: str) -> datetime:
+        """Parse an RFC 2822 Date header to naive local time, falling back to now"""
+        try:
+            parsed = parsedate_to_datetime(date_str)
+        except (TypeError, ValueError, IndexError):
+            return datetime.now()
+        if parsed is None:
+            return datetime.now()
+        return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+    
     def fetch_inbox_emails(self, max_count: int = 50) -> List[EmailItem]:
         """Fetch emails from inbox, excluding already triaged ones"""
         print(f"📥 Fetching up to {max_count} emails from inbox...")
         
-        # Query to exclude already processed emails
-        query = "in:inbox -label:TRIAGE_REVISIT -label:TRIAGE_ACTION_NEEDED -label:TRIAGE_OPT_OUT"
-        
-        # Get message list
-        messages = self.gmail_client.list_messages(query=query, max_results=max_count)
+        # Stream message ids page by page and fetch details one batch at a time
+        messages = islice(self.gmail_client.iter_messages(INBOX_TRIAGE_QUERY, page_size=max_count), max_count)
+        email_items = self._email_items(messages)
         
-        # Get full message details
+        print(f"✅ Fetched {len(email_items)} emails")
+        return email_items
+    
+    def _email_items(self, messages) -> List[EmailItem]:
+        """Fetch details for a stream of message stubs and convert them, keeping order"""
         email_items = []
-        for i, msg in enumerate(messages):
-            print(f"📧 Processing email {i+1}/{len(messages)}...", end='\r')
+        while True:
+            chunk = list(islice(messages, GMAIL_BATCH_SIZE))
+            if not chunk:
+                break
             
-            full_msg = self.gmail_client.get_message(msg['id'])
-            if full_msg:
-                email_item = self.gmail_to_email_item(full_msg)
-                email_items.append(email_item)
+            # Get message details in a batched request, keeping list order
+            full_messages = self.gmail_client.get_messages_batch([msg['id'] for msg in chunk])
+            for msg in chunk:
+                full_msg = full_messages.get(msg['id'])
+                if full_msg:
+                    email_item = self.gmail_to_email_item(full_msg)
+                    email_items.append(email_item)
         
-        print(f"\n✅ Fetched {len(email_items)} emails")
         return email_items
     
+    def _fetch_batches(self, batch_size: int, max_batches: int, batch_queue: queue.Queue,
+                       stop_event: threading.Event):
+        """Producer: fetch and pre-classify up to max_batches batches onto batch_queue, then a None sentinel"""
+        try:
+            messages = self.gmail_client.iter_messages(INBOX_TRIAGE_QUERY, page_size=batch_size * max_batches)
+            for _ in range(max_batches):
+                if stop_event.is_set():
+                    return
+                email_items = self._email_items(islice(messages, batch_size))
+                if not email_items:
+                    break
+                # Classification (mostly OpenAI round trips) also overlaps the current review
+                decisions = self.triage_system.classify_emails_ai(email_items)
+                if not self._put_batch(batch_queue, (email_items, decisions), stop_event):
+                    break
+        except Exception as e:
+            log.warning("❌ Error fetching emails: %s", e)
+        finally:
+            self._put_batch(batch_queue, None, stop_event)
+    
+    @staticmethod
+    def _put_batch(batch_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """Put item on the bounded queue, giving up if the session is stopped"""
+        while not stop_event.is_set():
+            try:
+                batch_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    @staticmethod
+    def _drain_queue(batch_queue: queue.Queue):
+        """Discard everything currently queued"""
+        try:
+            while True:
+                batch_queue.get_nowait()
+        except queue.Empty:
+            pass
+    
     def apply_triage_decisions(self, decisions: List[tuple]):
         """Apply triage decisions to Gmail"""
         print(f"\n📋 Applying {len(decisions)} triage decisions...")
         
+        # Decisions that share the same label change go out as one batchModify
+        label_groups = {}
+        
         for email_item, decision in decisions:
             try:
-                if decision.action == 'trash':
-                    self.gmail_client.trash_message(email_item.id)
-                    
-                elif decision.action == 'revisit':
-                    # Remove from inbox, add revisit label
-                    self.gmail_client.modify_message(
-                        email_item.id,
-                        add_labels=[self.labels['revisit']],
-                        remove_labels=['INBOX']
-                    )
-                    print(f"📦 Moved to revisit: {email_item.subject[:50]}...")
-                
-                elif decision.action == 'action_needed':
-                    # Keep in inbox, add action needed label
-                    self.gmail_client.modify_message(
-                        email_item.id,
-                        add_labels=[self.labels['action_needed']]
-                    )
-                    print(f"⚡ Marked action needed: {email_item.subject[:50]}...")
-                
-                elif decision.action == 'opt_out':
-                    # Handle opt-out: create draft and archive
-                    self._handle_opt_out_action(email_item, decision)
-                    
-                elif decision.action == 'spam':
-                    # Mark as spam for repeat offenders
-                    self._handle_spam_action(email_item, decision)
-                
-                elif decision.action == 'bulk_archive':
+                if decision.action == 'bulk_archive':
                     # Handle bulk archive for sender/subject
                     self._handle_bulk_archive_action(email_item, decision)
+                    continue
+                
+                changes = self._label_changes(email_item, decision)
+                if changes:
+                    # Only send labels the message doesn't already have / still has
+                    current_labels = set(email_item.labels)
+                    add_labels = frozenset(changes[0]) - current_labels
+                    remove_labels = frozenset(changes[1]) & current_labels
+                    if not add_labels and not remove_labels:
+                        continue
+                    
+                    # A dict keeps ids unique per group while preserving order
+                    label_groups.setdefault((add_labels, remove_labels), {})[email_item.id] = None
                 
             except Exception as e:
-                print(f"❌ Failed to apply {decision.action} to {email_item.id}: {e}")
+                # Tracebacks only when debugging; formatting one per failed email is costly
+                log.warning("❌ Failed to apply %s to %s: %s", decision.action, email_item.id, e,
+                            exc_info=log.isEnabledFor(logging.DEBUG))
+        
+        if label_groups:
+            # All label groups share one HTTP round trip
+            applied = self.gmail_client.batch_modify_label_groups([
+                (list(message_ids), list(add_labels), list(remove_labels))
+                for (add_labels, remove_labels), message_ids in label_groups.items()
+            ])
+            print(f"✅ Applied label changes to {applied} emails")
+    
+    def _label_changes(self, email_item: EmailItem, decision: TriageDecision):
+        """Return (add_labels, remove_labels) for a decision, or None if nothing to change"""
+        if decision.action == 'trash':
+            # Adding TRASH moves the message to the trash, like messages.trash
+            log.info("🗑️ Trashed message %s", email_item.id)
+            return [self.labels['trash']], ['INBOX', 'UNREAD']
+        
+        elif decision.action == 'revisit':
+            # Remove from inbox, add revisit label
+            log.info("📦 Moved to revisit: %.50s...", email_item.subject)
+            return [self.labels['revisit']], ['INBOX']
+        
+        elif decision.action == 'action_needed':
+            # Keep in inbox, add action needed label
+            log.info("⚡ Marked action needed: %.50s...", email_item.subject)
+            return [self.labels['action_needed']], []
+        
+        elif decision.action == 'opt_out':
+            # Handle opt-out: create draft and archive
+            return self._handle_opt_out_action(email_item, decision)
+        
+        elif decision.action == 'spam':
+            # Mark as spam for repeat offenders
+            return self._handle_spam_action(email_item, decision)
+        
+        return None
     
     def _handle_opt_out_action(self, email_item: EmailItem, decision: TriageDecision):
-        """Handle opt-out action: create draft and archive"""
-        try:
-            # Extract draft info from decision
-            if decision.suggested_rule and "opt_out_data:" in decision.suggested_rule:
-                draft_data_str = decision.suggested_rule.split("opt_out_data:", 1)[1]
-                # Parse the draft info (simplified parsing)
-                print(f"🚫 Creating data erasure draft for: {email_item.sender}")
-                
-                # For now, just archive and add opt-out label
-                # TODO: Implement actual draft creation via Gmail API
-                self.gmail_client.modify_message(
-                    email_item.id,
-                    add_labels=[self.labels['opt_out']],
-                    remove_labels=['INBOX']
-                )
-                print(f"📧 Opt-out processed: {email_item.subject[:50]}...")
-                print(f"💡 Draft creation would be implemented here")
+        """Handle opt-out action: create draft and return the archive label change"""
+        # Extract draft info from decision
+        if decision.suggested_rule and "opt_out_data:" in decision.suggested_rule:
+            draft_data_str = decision.suggested_rule.split("opt_out_data:", 1)[1]
+            # Parse the draft info (simplified parsing)
+            print(f"🚫 Creating data erasure draft for: {email_item.sender}")
             
-        except Exception as e:
-            print(f"❌ Error handling opt-out: {e}")
+            # For now, just archive and add opt-out label
+            # TODO: Implement actual draft creation via Gmail API
+            print(f"📧 Opt-out processed: {truncate(email_item.subject, 50)}")
+            print(f"💡 Draft creation would be implemented here")
+            return [self.labels['opt_out']], ['INBOX']
+        
+        return None
     
     def _handle_spam_action(self, email_item: EmailItem, decision: TriageDecision):
-        """Handle spam action for repeat offenders"""
-        try:
-            # Mark as spam and remove from inbox
-            self.gmail_client.modify_message(
-                email_item.id,
-                add_labels=['SPAM'],
-                remove_labels=['INBOX']
-            )
-            print(f"🚫 Marked as SPAM (repeat offender): {email_item.subject[:50]}...")
-            
-        except Exception as e:
-            print(f"❌ Error marking as spam: {e}")
+        """Handle spam action for repeat offenders: mark as spam and remove from inbox"""
+        log.info("🚫 Marked as SPAM (repeat offender): %.50s...", email_item.subject)
+        return [self.labels['spam']], ['INBOX']
     
     def _handle_bulk_archive_action(self, email_item: EmailItem, decision: TriageDecision):
         """Handle bulk archive action for sender/subject"""
@@ -428,57 +1078,81 @@ class SimpleGmailTriageConnector:
                 if matching_messages:
                     print(f"📧 Found {len(matching_messages)} matching emails (single threads only)")
                     
-                    # Process each matching email
-                    archived_count = 0
-                    for msg in matching_messages:
-                        try:
-                            msg_id = msg['id']
-                            # Mark as read and archive
-                            self.gmail_client.mark_as_read(msg_id)
-                            self.gmail_client.archive_message(msg_id)
-                            archived_count += 1
-                        except Exception as e:
-                            print(f"⚠️  Failed to process message {msg_id}: {e}")
-                    
-                    print(f"✅ Bulk archived {archived_count} emails from {email_item.sender}")
+                    # Mark as read and archive all matches in one batchModify call
+                    message_ids = [msg['id'] for msg in matching_messages]
+                    if self.gmail_client.batch_modify_messages(message_ids, remove_labels=['UNREAD', 'INBOX']):
+                        print(f"✅ Bulk archived {len(message_ids)} emails from {email_item.sender}")
+                    else:
+                        print(f"⚠️  Bulk archive for {email_item.sender} did not fully complete")
                 else:
                     print(f"📭 No matching single-thread emails found")
             
         except Exception as e:
             print(f"❌ Error handling bulk archive: {e}")
     
-    def run_triage_session(self, batch_size: int = 5):
-        """Run a complete triage session"""
+    def run_triage_session(self, batch_size: int = 5, max_batches: int = 1):
+        """Run a complete triage session
+        
+        Batches are fetched and classified on a background thread, so the next
+        batch is ready while the current one is being triaged.
+        """
         print("🚀 Starting Gmail Triage Session")
         print("="*60)
+        print(f"📥 Fetching up to {batch_size} emails per batch...")
+        
+        batch_queue = queue.Queue(maxsize=PREFETCH_BATCHES)
+        stop_event = threading.Event()
+        fetcher = threading.Thread(
+            target=self._fetch_batches,
+            args=(batch_size, max_batches, batch_queue, stop_event),
+            daemon=True
+        )
+        fetcher.start()
         
-        # Fetch emails
-        emails = self.fetch_inbox_emails(batch_size)
+        processed_any = False
+        try:
+            while True:
+                batch = batch_queue.get()
+                if batch is None:
+                    break
+                emails, suggestions = batch
+                processed_any = True
+                print(f"✅ Fetched {len(emails)} emails")
+                
+                # Process with triage system
+                decisions = self.triage_system.process_batch(emails, suggestions)
+                
+                # Apply decisions to Gmail
+                if decisions:
+                    self.apply_triage_decisions(decisions)
+        finally:
+            # Stop prefetching (e.g. on Ctrl+C) instead of leaving a fetch mid-RPC.
+            # Draining frees a producer blocked on a full queue right away; the
+            # join timeout only bounds an HTTP call that is already in flight.
+            stop_event.set()
+            self._drain_queue(batch_queue)
+            fetcher.join(timeout=2)
         
-        if not emails:
+        if not processed_any:
             print("📭 No emails to process!")
             return
         
-        # Process with triage system
-        decisions = self.triage_system.process_batch(emails)
-        
-        # Apply decisions to Gmail
-        if decisions:
-            self.apply_triage_decisions(decisions)
-        
         # Print final stats
         self.triage_system.print_session_stats()
 
 
 def main():
     """Main function"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("📧 Simple Gmail Triage System")
     print("Direct OAuth integration - simple and reliable!")
     print()
     
+    triage_system = EmailTriageSystem()
     try:
         # Initialize connector
-        connector = SimpleGmailTriageConnector()
+        connector = SimpleGmailTriageConnector(triage_system=triage_system)
         
         # Run triage session
         connector.run_triage_session(batch_size=5)
@@ -487,6 +1161,8 @@ def main():
         print("\n👋 Triage session interrupted by user")
     except Exception as e:
         print(f"\n❌ Error during triage session: {e}")
+    finally:
+        triage_system.close()
 
 
 if __name__ == "__main__":
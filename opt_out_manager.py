@@ -5,86 +5,185 @@ Handles data erasure requests and repeat offender tracking
 """
 
 import json
-import os
-from datetime import datetime, timedelta
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
-import re
+from typing import Dict
+import time
+
+# A domain asked again this long after its first opt-out is a repeat offender
+REPEAT_OFFENDER_WINDOW = 7 * 86400
+
+INSERT_REQUEST_SQL = '''
+    INSERT INTO opt_out_requests (domain, sender_email, ts) VALUES (?, ?, ?)
+'''
+
+# A later request turns the domain into a repeat offender once it falls
+# outside the window measured from the first request
+UPSERT_DOMAIN_SQL = '''
+    INSERT INTO opt_out (domain, sender_email, first_ts, request_count, is_repeat)
+    VALUES (?, ?, ?, 1, 0)
+    ON CONFLICT(domain) DO UPDATE SET
+        request_count = request_count + 1,
+        is_repeat = is_repeat OR excluded.first_ts - first_ts >= ?
+'''
+
+
+def _as_timestamp(value) -> float:
+    """Epoch seconds for a legacy JSON request date (ISO string or number)"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return value
+
 
 class OptOutManager:
     """Manages opt-out requests and repeat offender tracking"""
     
+    # Standard data erasure request text
+    _ERASURE_BODY = """To Whom It May Concern:
+
+I am hereby requesting immediate erasure of personal data concerning me. If I have given consent to the processing of my personal data, I am hereby withdrawing said consent. 
+
+If you have made the aforementioned data public, please take all reasonable steps for the erasure of all links, copies or replications. This applies not only to exact copies of the data concerned, but also to those from which information contained in the data concerned can be derived.
+
+I am including the following information necessary to identify me: email address/username/login associated with this email.
+
+Thank you in advance.
+
+"""
+    
     def __init__(self, data_dir: str = "./triage_data"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.db_path = self.data_dir / "opt_out.db"
         self.opt_out_file = self.data_dir / "opt_out_requests.json"
-        self.opt_out_data = self._load_opt_out_data()
+        self.opt_out_log_file = self.opt_out_file.with_suffix('.jsonl')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_database()
+        self._migrate_json()
+        # Repeat offenders are few and checked often, so they stay in memory
+        self._repeat_offenders = {
+            domain for (domain,) in self._conn.execute("SELECT domain FROM opt_out WHERE is_repeat")
+        }
+    
+    def _init_database(self):
+        """Create the opt-out tables"""
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS opt_out (
+                    domain TEXT PRIMARY KEY,
+                    sender_email TEXT NOT NULL,
+                    first_ts REAL NOT NULL,
+                    request_count INTEGER NOT NULL,
+                    is_repeat INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS opt_out_requests (
+                    domain TEXT NOT NULL,
+                    sender_email TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_opt_out_requests_domain
+                ON opt_out_requests(domain, ts)
+            ''')
     
-    def _load_opt_out_data(self) -> Dict:
-        """Load opt-out request data"""
+    def _migrate_json(self):
+        """Import opt_out_requests.json(.jsonl) once, then rename them to .bak"""
+        legacy_files = [path for path in (self.opt_out_file, self.opt_out_log_file) if path.exists()]
+        if not legacy_files:
+            return
+        
+        requests = []
         if self.opt_out_file.exists():
             with open(self.opt_out_file, 'r') as f:
-                return json.load(f)
-        return {}
+                for data in json.load(f).values():
+                    for request in data.get('requests', []):
+                        requests.append((request['sender_email'], _as_timestamp(request['date'])))
+        if self.opt_out_log_file.exists():
+            with open(self.opt_out_log_file, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from an interrupted write
+                    requests.append((record['sender_email'], _as_timestamp(record['date'])))
+        # The repeat-offender window is measured from each domain's earliest request
+        requests.sort(key=lambda request: request[1])
+        
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for sender_email, ts in requests:
+                    self._insert_request(cursor, self._extract_domain(sender_email), sender_email, ts)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        for path in legacy_files:
+            path.rename(path.with_name(path.name + '.bak'))
+    
+    @staticmethod
+    def _insert_request(cursor: sqlite3.Cursor, domain: str, sender_email: str, ts: float):
+        """Log one request and update its domain's summary row"""
+        cursor.execute(INSERT_REQUEST_SQL, (domain, sender_email, ts))
+        cursor.execute(UPSERT_DOMAIN_SQL, (domain, sender_email, ts, REPEAT_OFFENDER_WINDOW))
     
-    def _save_opt_out_data(self):
-        """Save opt-out request data"""
-        with open(self.opt_out_file, 'w') as f:
-            json.dump(self.opt_out_data, f, indent=2, default=str)
+    def close(self):
+        """Close the opt-out database"""
+        with self._lock:
+            self._conn.close()
     
-    def _extract_domain(self, email_address: str) -> str:
-        """Extract domain from email address"""
-        if '@' in email_address:
-            return email_address.split('@')[-1].lower()
-        return email_address.lower()
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _extract_domain(email_address: str) -> str:
+        """Extract domain from email address (the whole address if it has no '@')"""
+        return email_address.rpartition('@')[2].lower()
     
     def record_opt_out_request(self, sender_email: str) -> Dict:
         """Record an opt-out request and return request info"""
         domain = self._extract_domain(sender_email)
-        current_time = datetime.now()
-        
-        if domain not in self.opt_out_data:
-            self.opt_out_data[domain] = {
-                'sender_email': sender_email,
-                'requests': [],
-                'is_repeat_offender': False
-            }
-        
-        # Add new request to the list
-        self.opt_out_data[domain]['requests'].append({
-            'date': current_time.isoformat(),
-            'sender_email': sender_email
-        })
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert_request(cursor, domain, sender_email, time.time())
+                first_ts, request_count, is_repeat = cursor.execute(
+                    "SELECT first_ts, request_count, is_repeat FROM opt_out WHERE domain = ?", (domain,)
+                ).fetchone()
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
         
-        # Check if this makes them a repeat offender
-        requests = self.opt_out_data[domain]['requests']
-        if len(requests) >= 2:
-            # Check if latest request is more than 7 days after first
-            first_request = datetime.fromisoformat(requests[0]['date'])
-            latest_request = current_time
-            
-            if (latest_request - first_request).days >= 7:
-                self.opt_out_data[domain]['is_repeat_offender'] = True
-        
-        self._save_opt_out_data()
+        if is_repeat:
+            self._repeat_offenders.add(domain)
         
         return {
             'domain': domain,
-            'request_count': len(requests),
-            'is_repeat_offender': self.opt_out_data[domain]['is_repeat_offender'],
-            'first_request_date': requests[0]['date'] if requests else None
+            'request_count': request_count,
+            'is_repeat_offender': bool(is_repeat),
+            'first_request_date': datetime.fromtimestamp(first_ts).isoformat()
         }
     
     def is_repeat_offender(self, sender_email: str) -> bool:
         """Check if sender is a repeat offender"""
-        domain = self._extract_domain(sender_email)
-        return self.opt_out_data.get(domain, {}).get('is_repeat_offender', False)
+        return self._extract_domain(sender_email) in self._repeat_offenders
     
     def get_opt_out_stats(self) -> Dict:
         """Get opt-out statistics"""
-        total_domains = len(self.opt_out_data)
-        repeat_offenders = sum(1 for data in self.opt_out_data.values() if data.get('is_repeat_offender', False))
-        total_requests = sum(len(data.get('requests', [])) for data in self.opt_out_data.values())
+        with self._lock:
+            total_domains, repeat_offenders, total_requests = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(is_repeat), 0), COALESCE(SUM(request_count), 0) FROM opt_out"
+            ).fetchone()
         
         return {
             'total_domains': total_domains,
@@ -95,19 +194,6 @@ class OptOutManager:
     def generate_data_erasure_draft(self, sender_email: str, subject: str) -> Dict:
         """Generate a data erasure request draft email"""
         
-        # Standard data erasure request text
-        body = """To Whom It May Concern:
-
-I am hereby requesting immediate erasure of personal data concerning me. If I have given consent to the processing of my personal data, I am hereby withdrawing said consent. 
-
-If you have made the aforementioned data public, please take all reasonable steps for the erasure of all links, copies or replications. This applies not only to exact copies of the data concerned, but also to those from which information contained in the data concerned can be derived.
-
-I am including the following information necessary to identify me: email address/username/login associated with this email.
-
-Thank you in advance.
-
-"""
-        
         # Generate subject
         reply_subject = f"Re: {subject}" if not subject.startswith("Re:") else subject
         if "data erasure" not in reply_subject.lower():
@@ -116,7 +202,7 @@ Thank you in advance.
         return {
             'to': sender_email,
             'subject': reply_subject,
-            'body': body,
+            'body': self._ERASURE_BODY,
             'timestamp': datetime.now().isoformat()
         }
 
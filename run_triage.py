@@ -4,67 +4,164 @@ Email Triage System Launcher
 Simple launcher script with menu options
 """
 
+import atexit
 import sys
 import os
-import termios
-import tty
-from pathlib import Path
+import logging
+
+# Imported once up front; menu handlers report the error if this failed
+try:
+    from email_triage_system import EmailTriageSystem, getch as triage_getch
+    from gmail_oauth_client import SimpleGmailTriageConnector
+    IMPORT_ERROR = None
+except ImportError as e:
+    IMPORT_ERROR = e
+
+# view_stats queries; the triage system's connection keeps them in its statement cache.
+# The first is served by idx_decisions_action, the last by idx_pref_conf.
+DECISION_COUNTS_SQL = "SELECT action, COUNT(*) FROM decisions GROUP BY action"
+PREFERENCE_COUNT_SQL = "SELECT COUNT(*) FROM preferences"
+TOP_RULES_SQL = """
+    SELECT pattern_type, pattern_value, action, confidence, usage_count 
+    FROM preferences 
+    ORDER BY confidence DESC, usage_count DESC 
+    LIMIT 10
+"""
+
+# Rows fetched (and written to stdout) at a time when listing every preference
+PREFERENCE_LISTING_CHUNK = 1000
+
+INSERT_PREFERENCE_SQL = """
+    INSERT OR REPLACE INTO preferences 
+    (pattern_type, pattern_value, action, confidence, usage_count)
+    VALUES (?, ?, ?, ?, 0)
+"""
+
+# Files check_setup() expects in triage_data/; a positive result is remembered
+SETUP_FILES = {"config.json", "preferences.db"}
+_setup_ok = False
+
+# Shared by the stats and preference menus; created on first use
+_triage_singleton = None
+
+def _get_triage():
+    """Return the shared EmailTriageSystem"""
+    global _triage_singleton
+    if _triage_singleton is None:
+        if IMPORT_ERROR:
+            raise IMPORT_ERROR
+        _triage_singleton = EmailTriageSystem()
+        atexit.register(_close_triage)
+    return _triage_singleton
+
+def _close_triage():
+    """Close the shared triage system and its database connection"""
+    _triage_singleton.close()
 
 def getch():
-    """Get a single character from stdin without pressing enter"""
-    try:
-        # Unix/Linux/macOS
-        fd = sys.stdin.fileno()
-        old_settings = termios.tcgetattr(fd)
-        try:
-            tty.setraw(sys.stdin.fileno())
-            ch = sys.stdin.read(1)
-        finally:
-            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-        return ch
-    except:
-        # Fallback for Windows or if termios fails
-        try:
-            import msvcrt
-            return msvcrt.getch().decode('utf-8')
-        except:
-            # Final fallback - use regular input
-            return input("Press key: ").strip()
+    """Get a single character from stdin without pressing enter
+    
+    Shares email_triage_system.getch, so keys read inside its raw_stdin()
+    block skip the per-keystroke terminal mode switch.
+    """
+    if IMPORT_ERROR:
+        return input("Press key: ").strip()
+    return triage_getch()
+
+def read_menu_key(prompt: str) -> str:
+    """Read a one-key menu choice without Enter; line input when not on a terminal"""
+    if IMPORT_ERROR or not sys.stdin.isatty():
+        return input(prompt).strip()
+    print(prompt, end="", flush=True)
+    key = getch()
+    if key == "\x03":  # raw mode delivers Ctrl+C as a character
+        raise KeyboardInterrupt
+    print(key)
+    return key.strip()
 
 def check_setup():
     """Check if system is set up"""
-    data_dir = Path("./triage_data")
-    config_file = data_dir / "config.json"
-    db_file = data_dir / "preferences.db"
+    global _setup_ok
+    if _setup_ok:
+        return True
+    
+    # One directory read instead of a stat per required file
+    try:
+        with os.scandir("./triage_data") as entries:
+            names = {entry.name for entry in entries}
+    except OSError:
+        names = set()
     
-    if not data_dir.exists() or not config_file.exists() or not db_file.exists():
+    if not SETUP_FILES <= names:
         print("⚠️  System not set up. Running setup...")
-        os.system("python setup.py")
+        run_setup()
         return False
+    _setup_ok = True
     return True
 
+# Menu and help screens are built once and printed with a single call
+MENU_TEXT = "\n".join([
+    "\n" + "="*60,
+    "📧 EMAIL TRIAGE SYSTEM",
+    "="*60,
+    "1. 🚀 Run Gmail Triage (OAuth integration)",
+    "2. ⚙️  Setup/Configuration",
+    "3. 📊 View Statistics",
+    "4. 🔧 Manage Preferences",
+    "5. ❓ Help",
+    "6. 🚪 Exit",
+    "="*60,
+])
+
+HELP_TEXT = "\n".join([
+    "\n❓ HELP",
+    "="*40,
+    "📧 Email Triage System helps you process large volumes of emails efficiently.",
+    "",
+    "🎯 How it works:",
+    "1. Fetches emails from your inbox",
+    "2. AI classifies each email into 3 categories",
+    "3. High-confidence decisions are auto-applied",
+    "4. Uncertain cases require your yes/no decision",
+    "5. System learns from your choices",
+    "",
+    "🔧 Setup Requirements:",
+    "- OpenAI API key (optional, improves accuracy)",
+    "- Gmail OAuth credentials (see docs/gmail_oauth_setup.md)",
+    "- Python dependencies (see requirements.txt)",
+    "",
+    "📚 For detailed documentation, see README.md",
+])
+
 def show_menu():
     """Show main menu"""
-    print("\n" + "="*60)
-    print("📧 EMAIL TRIAGE SYSTEM")
-    print("="*60)
-    print("1. 🚀 Run Gmail Triage (OAuth integration)")
-    print("2. ⚙️  Setup/Configuration")
-    print("3. 📊 View Statistics")
-    print("4. 🔧 Manage Preferences")
-    print("5. ❓ Help")
-    print("6. 🚪 Exit")
-    print("="*60)
+    print(MENU_TEXT)
+
+def _read_int(prompt: str, env_var: str, default: int) -> int:
+    """Prompt for a positive integer, or read env_var when stdin is not a terminal"""
+    if sys.stdin.isatty():
+        value = input(f"{prompt} (default {default}): ").strip()
+    else:
+        value = os.environ.get(env_var, "")
+    try:
+        number = int(value) if value else default
+    except ValueError:
+        print(f"⚠️  Invalid number '{value}', using {default}")
+        return default
+    return number if number > 0 else default
 
 def run_gmail_triage():
     """Run Gmail triage"""
     print("🚀 Starting Gmail Triage...")
     try:
-        from gmail_oauth_client import SimpleGmailTriageConnector
-        connector = SimpleGmailTriageConnector()
+        if IMPORT_ERROR:
+            raise IMPORT_ERROR
+        # Share the launcher's triage system; _close_triage closes it at exit
+        connector = SimpleGmailTriageConnector(triage_system=_get_triage())
         
-        batch_size = int(input("Batch size (default 5): ") or "5")
-        connector.run_triage_session(batch_size)
+        batch_size = _read_int("Batch size", "TRIAGE_BATCH_SIZE", 5)
+        max_batches = _read_int("Number of batches", "TRIAGE_MAX_BATCHES", 1)
+        connector.run_triage_session(batch_size, max_batches)
     except ImportError as e:
         print(f"❌ Import error: {e}")
         print("Make sure all dependencies are installed: pip install -r requirements.txt")
@@ -88,40 +185,34 @@ def view_stats():
     """View statistics"""
     print("📊 Statistics")
     try:
-        from email_triage_system import EmailTriageSystem
-        import sqlite3
-        
-        triage = EmailTriageSystem()
-        conn = sqlite3.connect(triage.db_path)
-        cursor = conn.cursor()
-        
-        # Decision stats
-        cursor.execute("SELECT action, COUNT(*) FROM decisions GROUP BY action")
-        decisions = cursor.fetchall()
-        
-        print("\n📈 Decision History:")
-        for action, count in decisions:
-            print(f"  {action}: {count}")
+        with _get_triage().db_cursor() as cursor:
+            # One read transaction: a single lock and a consistent snapshot for all three
+            cursor.execute("BEGIN")
+            try:
+                # Decision stats
+                cursor.execute(DECISION_COUNTS_SQL)
+                decisions = cursor.fetchall()
+                
+                # Preference stats
+                cursor.execute(PREFERENCE_COUNT_SQL)
+                pref_count = cursor.fetchone()[0]
+                
+                # Top preferences
+                cursor.execute(TOP_RULES_SQL)
+                top_rules = cursor.fetchall()
+            finally:
+                cursor.execute("COMMIT")
         
-        # Preference stats
-        cursor.execute("SELECT COUNT(*) FROM preferences")
-        pref_count = cursor.fetchone()[0]
-        print(f"\n🧠 Learned Preferences: {pref_count}")
-        
-        # Top preferences
-        cursor.execute("""
-            SELECT pattern_type, pattern_value, action, confidence, usage_count 
-            FROM preferences 
-            ORDER BY confidence DESC, usage_count DESC 
-            LIMIT 10
-        """)
-        
-        print("\n🎯 Top Learned Rules:")
-        for row in cursor.fetchall():
-            pattern_type, pattern_value, action, confidence, usage_count = row
-            print(f"  {pattern_type}:{pattern_value} → {action} (confidence: {confidence:.2f}, used: {usage_count}x)")
-        
-        conn.close()
+        # Build the whole report and write it once
+        lines = ["\n📈 Decision History:"]
+        lines.extend(f"  {action}: {count}" for action, count in decisions)
+        lines.append(f"\n🧠 Learned Preferences: {pref_count}")
+        lines.append("\n🎯 Top Learned Rules:")
+        lines.extend(
+            f"  {pattern_type}:{pattern_value} → {action} (confidence: {confidence:.2f}, used: {usage_count}x)"
+            for pattern_type, pattern_value, action, confidence, usage_count in top_rules
+        )
+        print("\n".join(lines))
         
     except Exception as e:
         print(f"❌ Error loading stats: {e}")
@@ -134,7 +225,7 @@ def manage_preferences():
     print("3. Delete preference")
     print("4. Back to main menu")
     
-    choice = input("Choice: ").strip()
+    choice = read_menu_key("Choice: ")
     
     if choice == "1":
         view_all_preferences()
@@ -146,25 +237,24 @@ def manage_preferences():
 def view_all_preferences():
     """View all preferences"""
     try:
-        from email_triage_system import EmailTriageSystem
-        import sqlite3
-        
-        triage = EmailTriageSystem()
-        conn = sqlite3.connect(triage.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, pattern_type, pattern_value, action, confidence, usage_count 
-            FROM preferences 
-            ORDER BY confidence DESC
-        """)
-        
-        print("\n📋 All Preferences:")
-        for row in cursor.fetchall():
-            id_, pattern_type, pattern_value, action, confidence, usage_count = row
-            print(f"  [{id_}] {pattern_type}:{pattern_value} → {action} (conf: {confidence:.2f}, used: {usage_count}x)")
-        
-        conn.close()
+        with _get_triage().db_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, pattern_type, pattern_value, action, confidence, usage_count 
+                FROM preferences 
+                ORDER BY confidence DESC
+            """)
+            
+            print("\n📋 All Preferences:")
+            # One write per chunk of rows; the table can hold thousands of rules
+            while True:
+                rows = cursor.fetchmany(PREFERENCE_LISTING_CHUNK)
+                if not rows:
+                    break
+                sys.stdout.write("\n".join(
+                    f"  [{id_}] {pattern_type}:{pattern_value} → {action} (conf: {confidence:.2f}, used: {usage_count}x)"
+                    for id_, pattern_type, pattern_value, action, confidence, usage_count in rows
+                ) + "\n")
+        sys.stdout.flush()
     except Exception as e:
         print(f"❌ Error: {e}")
 
@@ -197,49 +287,78 @@ def add_manual_preference():
         return
     
     try:
-        from email_triage_system import EmailTriageSystem
-        import sqlite3
+        with _get_triage().db_cursor() as cursor:
+            cursor.execute(INSERT_PREFERENCE_SQL, (pattern_type, pattern_value, action, confidence))
         
-        triage = EmailTriageSystem()
-        conn = sqlite3.connect(triage.db_path)
-        cursor = conn.cursor()
+        print(f"✅ Added preference: {pattern_type}:{pattern_value} → {action}")
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO preferences 
-            (pattern_type, pattern_value, action, confidence, usage_count)
-            VALUES (?, ?, ?, ?, 0)
-        """, (pattern_type, pattern_value, action, confidence))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+def delete_preference():
+    """Delete preferences by id, or prune those below a confidence threshold"""
+    print("\n🗑️  Delete Preferences")
+    view_all_preferences()
+    
+    choice = input("Ids to delete (comma-separated), or 'p' to prune by confidence: ").strip().lower()
+    try:
+        # Each path is a single DELETE, so SQLite filters rows without sending them back
+        if choice == "p":
+            threshold = float(input("Delete preferences with confidence below: "))
+            query, params = "DELETE FROM preferences WHERE confidence < ?", (threshold,)
+        else:
+            ids = [int(id_) for id_ in choice.split(",") if id_.strip()]
+            if not ids:
+                print("❌ No ids given")
+                return
+            placeholders = ",".join("?" * len(ids))
+            query, params = f"DELETE FROM preferences WHERE id IN ({placeholders})", ids
         
-        conn.commit()
-        conn.close()
+        with _get_triage().db_cursor() as cursor:
+            cursor.execute(query, params)
+            deleted = cursor.rowcount
         
-        print(f"✅ Added preference: {pattern_type}:{pattern_value} → {action}")
+        print(f"✅ Deleted {deleted} preferences")
         
+    except ValueError:
+        print("❌ Invalid number")
     except Exception as e:
         print(f"❌ Error: {e}")
 
+def bulk_add_preferences(rows):
+    """Add (pattern_type, pattern_value, action, confidence) rows in one transaction"""
+    with _get_triage().db_cursor() as cursor:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany(INSERT_PREFERENCE_SQL, rows)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
 def show_help():
     """Show help"""
-    print("\n❓ HELP")
-    print("="*40)
-    print("📧 Email Triage System helps you process large volumes of emails efficiently.")
-    print()
-    print("🎯 How it works:")
-    print("1. Fetches emails from your inbox")
-    print("2. AI classifies each email into 3 categories")
-    print("3. High-confidence decisions are auto-applied")
-    print("4. Uncertain cases require your yes/no decision")
-    print("5. System learns from your choices")
-    print()
-    print("🔧 Setup Requirements:")
-    print("- OpenAI API key (optional, improves accuracy)")
-    print("- Gmail OAuth credentials (see docs/gmail_oauth_setup.md)")
-    print("- Python dependencies (see requirements.txt)")
-    print()
-    print("📚 For detailed documentation, see README.md")
+    print(HELP_TEXT)
+
+def exit_launcher():
+    """Leave the launcher"""
+    print("👋 Goodbye!")
+    sys.exit(0)
+
+# Main menu keys, in show_menu() order
+MENU_ACTIONS = {
+    "1": run_gmail_triage,
+    "2": run_setup,
+    "3": view_stats,
+    "4": manage_preferences,
+    "5": show_help,
+    "6": exit_launcher,
+}
 
 def main():
     """Main launcher"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("🚀 Email Triage System Launcher")
     
     # Check if setup is complete
@@ -248,21 +367,11 @@ def main():
     
     while True:
         show_menu()
-        choice = input("\nEnter your choice (1-6): ").strip()
+        choice = read_menu_key(f"\nEnter your choice (1-{len(MENU_ACTIONS)}): ")
         
-        if choice == "1":
-            run_gmail_triage()
-        elif choice == "2":
-            run_setup()
-        elif choice == "3":
-            view_stats()
-        elif choice == "4":
-            manage_preferences()
-        elif choice == "5":
-            show_help()
-        elif choice == "6":
-            print("👋 Goodbye!")
-            sys.exit(0)
+        action = MENU_ACTIONS.get(choice)
+        if action:
+            action()
         else:
             print("❌ Invalid choice. Please try again.")
         
@@ -4,9 +4,15 @@ Test script to demonstrate async TTS with immediate input
 """
 
 import time
+from functools import lru_cache
 from email_triage_system import EmailTriageSystem, EmailItem, TriageDecision
 from datetime import datetime
 
+@lru_cache(maxsize=1)
+def get_triage_system() -> EmailTriageSystem:
+    """Build the triage system (database, config, TTS) once for every test that needs it"""
+    return EmailTriageSystem()
+
 def test_async_behavior():
     """Test that TTS starts immediately but input is accepted right away"""
     
@@ -21,7 +27,7 @@ def test_async_behavior():
     print()
     
     # Initialize system
-    triage = EmailTriageSystem()
+    triage = get_triage_system()
     
     # Create a test email
     test_email = EmailItem(
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Batch classification: rules per email, AI requests deduplicated by sender/subject template
+"""
+
+from datetime import datetime
+
+import pytest
+
+from email_triage_system import EmailItem, EmailTriageSystem, TriageDecision
+
+
+@pytest.fixture
+def triage(tmp_path):
+    system = EmailTriageSystem(str(tmp_path / "triage_data"))
+    system.tts_manager = None
+    yield system
+    system.close()
+
+
+def make_email(email_id, snippet, subject="Weekly update 12", sender="team@example.com"):
+    return EmailItem(
+        id=email_id,
+        sender=sender,
+        subject=subject,
+        snippet=snippet,
+        timestamp=datetime.now(),
+        labels=["INBOX"],
+        thread_id=f"thread_{email_id}",
+    )
+
+
+def test_rules_score_each_email_in_a_group(triage):
+    """Without AI, a sibling is not given the representative's keyword-based decision"""
+    emails = [make_email("1", "urgent: please reply"), make_email("2", "hello there")]
+
+    decisions = triage.classify_emails_ai(emails)
+
+    assert [d.email_id for d in decisions] == ["1", "2"]
+    assert decisions[0].action == "action_needed"
+    assert decisions[1].action == triage.classify_email_rules(emails[1]).action == "revisit"
+
+
+def test_ai_request_sent_once_per_subject_template(triage):
+    """Issue numbers differ, the template doesn't: one AI request serves the group"""
+    triage._ai_enabled = True
+    requested = []
+
+    def fake_request(email, pref_context=None):
+        requested.append(email.id)
+        return TriageDecision(email_id=email.id, action="trash", confidence=0.9, reasoning="ai")
+
+    triage._request_ai_classification = fake_request
+    emails = [make_email("1", "a", subject="Digest #41"), make_email("2", "b", subject="Digest #42")]
+
+    decisions = triage.classify_emails_ai(emails)
+
+    assert requested == ["1"]
+    assert [(d.email_id, d.action) for d in decisions] == [("1", "trash"), ("2", "trash")]
+
+
+def test_failed_ai_request_falls_back_to_rules_per_email(triage):
+    triage._ai_enabled = True
+    triage._request_ai_classification = lambda email, pref_context=None: None
+    emails = [make_email("1", "urgent: please reply"), make_email("2", "hello there")]
+
+    decisions = triage.classify_emails_ai(emails)
+
+    assert [d.action for d in decisions] == ["action_needed", "revisit"]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Message cache validation against Gmail history, with a fake Gmail service (no network needed)
+"""
+
+import threading
+
+from gmail_oauth_client import GmailOAuthClient, _MessageStore
+
+
+class FakeRequest:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class FakeHistory:
+    def __init__(self, pages):
+        self.pages = pages
+        self.start_ids = []
+
+    def list(self, userId, startHistoryId, maxResults):
+        self.start_ids.append(startHistoryId)
+        page = self.pages[0]
+        return page if isinstance(page, FakeRequest) else FakeRequest(page)
+
+    def list_next(self, request, response):
+        index = self.pages.index(response) + 1
+        return FakeRequest(self.pages[index]) if index < len(self.pages) else None
+
+
+class FakeUsers:
+    def __init__(self, profile, history):
+        self.profile = profile
+        self._history = history
+
+    def getProfile(self, userId):
+        return self.profile
+
+    def history(self):
+        return self._history
+
+
+class FakeService:
+    def __init__(self, profile, history_pages=()):
+        self._users = FakeUsers(profile, FakeHistory(list(history_pages)))
+
+    def users(self):
+        return self._users
+
+
+def make_client(tmp_path, service):
+    """A client wired to a fake service, skipping OAuth"""
+    client = GmailOAuthClient.__new__(GmailOAuthClient)
+    client._message_store = _MessageStore(str(tmp_path / "message_cache.db"))
+    client._owner_thread = threading.get_ident()
+    client.service = service
+    client._execute = lambda request: request.execute()
+    return client
+
+
+def seed(client, *message_ids, history_id="100"):
+    client._message_store.put_many({message_id: {'id': message_id} for message_id in message_ids})
+    client._message_store.set_meta('history_id', history_id)
+
+
+def cached_ids(client, *message_ids):
+    return set(client._message_store.get_many(list(message_ids)))
+
+
+def test_history_deltas_drop_changed_messages(tmp_path):
+    """Deleted, relabelled and added messages are dropped; untouched ones stay cached"""
+    page_1 = {'history': [
+        {'messages': [{'id': 'a'}], 'labelsAdded': [{'message': {'id': 'a'}, 'labelIds': ['STARRED']}]},
+        {'labelsRemoved': [{'message': {'id': 'b'}, 'labelIds': ['INBOX']}]},
+    ]}
+    page_2 = {'history': [{'messagesDeleted': [{'message': {'id': 'c'}}]}]}
+    service = FakeService(FakeRequest({'historyId': '200'}), [page_1, page_2])
+    client = make_client(tmp_path, service)
+    seed(client, 'a', 'b', 'c', 'd')
+
+    client.sync_message_cache()
+
+    assert cached_ids(client, 'a', 'b', 'c', 'd') == {'d'}
+    assert service.users().history().start_ids == ['100']
+    assert client._message_store.get_meta('history_id') == '200'
+
+
+def test_expired_history_id_clears_cache(tmp_path):
+    """history.list 404s once the stored id is too old: nothing cached can be trusted"""
+    expired = FakeRequest(error=Exception("<HttpError 404 Requested entity was not found>"))
+    client = make_client(tmp_path, FakeService(FakeRequest({'historyId': '900'}), [expired]))
+    seed(client, 'a', 'b')
+
+    client.sync_message_cache()
+
+    assert cached_ids(client, 'a', 'b') == set()
+    assert client._message_store.get_meta('history_id') == '900'
+
+
+def test_profile_failure_clears_cache_and_keeps_history_id(tmp_path):
+    """Without a current history id the cache is cleared, and the old id is kept for next run"""
+    failed = FakeRequest(error=Exception("network down"))
+    client = make_client(tmp_path, FakeService(failed))
+    seed(client, 'a', 'b')
+
+    client.sync_message_cache()
+
+    assert cached_ids(client, 'a', 'b') == set()
+    assert client._message_store.get_meta('history_id') == '100'
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Opt-out tracking: one-time import of the legacy JSON/JSONL files and the 7-day repeat-offender rule
+"""
+
+import json
+import time
+from datetime import datetime
+
+from opt_out_manager import OptOutManager
+
+DAY = 86400
+
+
+def iso_days_ago(days):
+    return datetime.fromtimestamp(time.time() - days * DAY).isoformat()
+
+
+def seed_legacy_files(data_dir):
+    """opt_out_requests.json with ISO dates, plus the later .jsonl log with epoch seconds"""
+    data_dir.mkdir()
+    (data_dir / "opt_out_requests.json").write_text(json.dumps({
+        "spam.com": {
+            "sender_email": "news@spam.com",
+            "requests": [
+                {"date": iso_days_ago(20), "sender_email": "news@spam.com"},
+                {"date": iso_days_ago(12), "sender_email": "deals@spam.com"},
+            ],
+            "is_repeat_offender": True,
+        },
+        "shop.com": {
+            "sender_email": "hi@shop.com",
+            "requests": [{"date": iso_days_ago(5), "sender_email": "hi@shop.com"}],
+            "is_repeat_offender": False,
+        },
+    }))
+    (data_dir / "opt_out_requests.jsonl").write_text(
+        json.dumps({"sender_email": "promo@shop.com", "date": time.time() - 2 * DAY}) + "\n"
+        + json.dumps({"sender_email": "a@list.org", "date": time.time() - 9 * DAY}) + "\n"
+        + '{"sender_email": "torn@'
+    )
+
+
+def test_legacy_files_are_imported_once(tmp_path):
+    data_dir = tmp_path / "triage_data"
+    seed_legacy_files(data_dir)
+
+    manager = OptOutManager(str(data_dir))
+    try:
+        assert manager.get_opt_out_stats() == {'total_domains': 3, 'repeat_offenders': 1, 'total_requests': 5}
+        assert manager.is_repeat_offender("anyone@spam.com")
+        assert not manager.is_repeat_offender("hi@shop.com")
+        rows = dict(manager._conn.execute("SELECT domain, request_count FROM opt_out"))
+        assert rows == {'spam.com': 2, 'shop.com': 2, 'list.org': 1}
+    finally:
+        manager.close()
+
+    assert not (data_dir / "opt_out_requests.json").exists()
+    assert (data_dir / "opt_out_requests.json.bak").exists()
+    assert (data_dir / "opt_out_requests.jsonl.bak").exists()
+
+    # Reopening must not import the renamed files again
+    manager = OptOutManager(str(data_dir))
+    try:
+        assert manager.get_opt_out_stats()['total_requests'] == 5
+    finally:
+        manager.close()
+
+
+def test_repeat_offender_after_seven_days(tmp_path):
+    """A domain asked again 7+ days after its first request becomes a repeat offender"""
+    data_dir = tmp_path / "triage_data"
+    seed_legacy_files(data_dir)
+
+    manager = OptOutManager(str(data_dir))
+    try:
+        # First shop.com request was 5 days ago: still inside the window
+        info = manager.record_opt_out_request("hi@shop.com")
+        assert info['request_count'] == 3
+        assert not info['is_repeat_offender']
+
+        # First list.org request was 9 days ago
+        info = manager.record_opt_out_request("b@list.org")
+        assert info['request_count'] == 2
+        assert info['is_repeat_offender']
+        assert manager.is_repeat_offender("c@list.org")
+
+        # A brand-new domain asked twice in a row is not a repeat offender
+        manager.record_opt_out_request("x@new.io")
+        assert not manager.record_opt_out_request("x@new.io")['is_repeat_offender']
+    finally:
+        manager.close()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Preference learning: the batched upsert's confidence and usage arithmetic
+"""
+
+from datetime import datetime
+
+import pytest
+
+from email_triage_system import EmailItem, EmailTriageSystem, TriageDecision
+
+
+@pytest.fixture
+def triage(tmp_path):
+    system = EmailTriageSystem(str(tmp_path / "triage_data"))
+    system.tts_manager = None
+    yield system
+    system.close()
+
+
+def make_pair(email_id, action, sender="news@shop.com", subject="Weekly deals roundup"):
+    email = EmailItem(
+        id=email_id,
+        sender=sender,
+        subject=subject,
+        snippet="",
+        timestamp=datetime.now(),
+        labels=["INBOX"],
+        thread_id=f"thread_{email_id}",
+    )
+    return email, TriageDecision(email_id=email_id, action=action, confidence=0.5, reasoning="manual")
+
+
+def preferences(triage):
+    with triage.db_cursor() as cursor:
+        cursor.execute("SELECT pattern_type, pattern_value, action, confidence, usage_count FROM preferences")
+        return {row[:3]: row[3:] for row in cursor.fetchall()}
+
+
+def test_repeated_decision_raises_confidence_and_usage(triage):
+    triage.learn_from_decisions_batch([make_pair("1", "trash")])
+    assert preferences(triage)[('sender', 'news@shop.com', 'trash')] == (pytest.approx(0.6), 1)
+
+    triage.learn_from_decisions_batch([make_pair("2", "trash")])
+    rows = preferences(triage)
+    assert set(rows) == {
+        ('sender', 'news@shop.com', 'trash'),
+        ('domain', 'shop.com', 'trash'),
+        ('subject_keyword', 'weekly', 'trash'),
+        ('subject_keyword', 'deals', 'trash'),
+        ('subject_keyword', 'roundup', 'trash'),
+    }
+    for confidence, usage_count in rows.values():
+        assert confidence == pytest.approx(0.7)
+        assert usage_count == 2
+
+
+def test_conflicting_action_keeps_other_patterns(triage):
+    """A different action adds its own rows; the existing action's rows are untouched"""
+    triage.learn_from_decisions_batch([make_pair("1", "trash"), make_pair("2", "trash")])
+    before = preferences(triage)
+
+    triage.learn_from_decisions_batch([make_pair("3", "action_needed")])
+    after = preferences(triage)
+
+    assert {key: after[key] for key in before} == before
+    assert after[('sender', 'news@shop.com', 'action_needed')] == (pytest.approx(0.6), 1)
+    assert len(after) == 2 * len(before)
+
+    with triage.db_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM decisions")
+        assert cursor.fetchone()[0] == 3
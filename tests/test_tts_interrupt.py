@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Interrupting PCM speech mid-playback, with a fake output stream (no audio device needed)
+"""
+
+import threading
+import time
+
+from tts_manager import TTSManager
+
+
+class FakeOutputStream:
+    """Stands in for sounddevice.RawOutputStream: each write takes as long as it would play"""
+
+    def __init__(self, seconds_per_write=0.01):
+        self.seconds_per_write = seconds_per_write
+        self.writes = 0
+        self.aborts = 0
+
+    def write(self, data):
+        self.writes += 1
+        time.sleep(self.seconds_per_write)
+
+    def abort(self):
+        self.aborts += 1
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeRaw:
+    chunked = False
+
+
+class FakeResponse:
+    """Streamed ElevenLabs PCM response"""
+
+    raw = FakeRaw()
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_content(self, chunk_size=None):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+def make_tts(tmp_path):
+    tts = TTSManager({'enable_tts': False}, cache_dir=str(tmp_path))
+    tts.pcm_stream = FakeOutputStream()
+    return tts
+
+
+def test_interrupt_stops_streamed_pcm(tmp_path):
+    """A keypress (interrupt_current_speech) mid-stream aborts the device and stops writing"""
+    tts = make_tts(tmp_path)
+    response = FakeResponse([b'\x00' * 2048] * 30)
+
+    threading.Timer(0.05, tts.interrupt_current_speech).start()
+    started = time.time()
+    assert tts._play_pcm_stream(response, interruptible=True) is False
+
+    assert time.time() - started < 0.2
+    assert tts.pcm_stream.aborts == 1
+    assert tts.pcm_stream.writes < 30
+    assert not tts.is_playing.is_set()
+
+
+def test_non_interruptible_pcm_plays_through(tmp_path):
+    """Non-interruptible speech ignores interrupt_current_speech"""
+    tts = make_tts(tmp_path)
+    response = FakeResponse([b'\x00' * 2048] * 10)
+
+    threading.Timer(0.03, tts.interrupt_current_speech).start()
+    assert tts._play_pcm_stream(response, interruptible=False) is True
+
+    assert tts.pcm_stream.aborts == 0
+    assert tts.pcm_stream.writes == 10
+
+
+def test_interrupt_stops_cached_pcm(tmp_path):
+    """Cached .pcm clips stop on interrupt_current_speech as well"""
+    tts = make_tts(tmp_path)
+    clip = tmp_path / 'clip.pcm'
+    clip.write_bytes(b'\x00' * 2048 * 30)
+
+    threading.Timer(0.05, tts.interrupt_current_speech).start()
+    assert tts._play_cached_audio(clip, interruptible=True) is False
+
+    assert tts.pcm_stream.aborts == 1
+    assert tts.pcm_stream.writes < 30
@@ -4,12 +4,16 @@ Text-to-Speech Manager for Email Triage System
 Supports multiple TTS providers including ElevenLabs Flash v2.5
 """
 
+import hashlib
+import itertools
 import json
 import os
+import re
+import subprocess
 import tempfile
 import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 import time
 import queue
 import io
@@ -17,6 +21,7 @@ import io
 # Optional imports - graceful degradation if not available
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     HAS_REQUESTS = True
 except ImportError:
     HAS_REQUESTS = False
@@ -39,67 +44,210 @@ try:
 except ImportError:
     HAS_PLAYSOUND = False
 
+try:
+    import sounddevice
+    HAS_SOUNDDEVICE = True
+except (ImportError, OSError):  # OSError: PortAudio library not found
+    HAS_SOUNDDEVICE = False
+
+# Rendered audio is kept for fixed prompts and per-email details ("Email from
+# ... Subject: ..."), which repeat across runs and are prewarmed for the next email
+AUDIO_CACHE_MAX_CHARS = 300
+
+# Oldest cached clips beyond this count are pruned at startup
+AUDIO_CACHE_MAX_FILES = 2000
+
+# Raw 16-bit mono PCM requested (and cached) whenever sounddevice can play it,
+# so ElevenLabs audio is written straight to the device with no MP3 decode
+PCM_SAMPLE_RATE = 22050
+
+# PCM is written in slices this size (~46ms at 22.05 kHz) so a cancel takes effect quickly
+PCM_WRITE_BYTES = 2048
+
+# 4 KiB chunks buffered between the download thread and the device (~6s of audio)
+PCM_BUFFER_CHUNKS = 64
+
+# Keep-alive connections to ElevenLabs: playback, prewarm and voice listing can overlap
+ELEVENLABS_POOL_SIZE = 4
+
+# Phrase lists waiting for the prewarm worker; the oldest is dropped to make room
+PREWARM_QUEUE_SIZE = 4
+
+# (connect, read) seconds for ElevenLabs requests
+ELEVENLABS_TIMEOUT = (5, 30)
+
+# Seconds a fetched ElevenLabs voice list is reused
+VOICES_CACHE_TTL = 300
+
+# speak_async queue order; "high" also cuts off whatever is playing
+SPEECH_PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+# Command-line players tried in order when no audio library is installed
+SYSTEM_PLAYERS = (
+    ["mpg123", "-q"],
+    ["ffplay", "-nodisp", "-autoexit", "-v", "quiet"],
+)
+
+# Sentence boundaries for speak_stream: terminal punctuation followed by whitespace
+# (so decimals like 3.5 never split), skipping common abbreviations and fragments
+SENTENCE_END_RE = re.compile(r'[.!?]+(?=\s)')
+SENTENCE_ABBREVIATIONS = ('Dr.', 'Mr.', 'Mrs.', 'Ms.', 'St.', 'vs.', 'e.g.', 'i.e.')
+MIN_SENTENCE_CHARS = 10
+
+
+# Symbols spoken as words
+_SPEECH_TABLE = {
+    '@': ' at ',
+    '#': ' number ',
+    '&': ' and ',
+    '%': ' percent ',
+    '$': ' dollars ',
+    '€': ' euros ',
+    '£': ' pounds ',
+    '→': ' goes to ',
+    '←': ' comes from ',
+    '✅': ' success ',
+    '❌': ' error ',
+    '⚠️': ' warning ',
+    '🔊': '',
+    '📧': ' email ',
+    '🗑️': ' trash ',
+    '⏰': ' later ',
+    '⚡': ' action needed ',
+    '🤖': ' AI ',
+}
+# Single-codepoint symbols are rewritten in one str.translate pass; only the
+# multi-codepoint emoji (⚠️, 🗑️) need the regex, which also collapses whitespace
+_SPEECH_CHAR_TABLE = str.maketrans({key: value for key, value in _SPEECH_TABLE.items() if len(key) == 1})
+# Control characters other than whitespace are dropped in the same pass
+_SPEECH_CHAR_TABLE.update(dict.fromkeys(
+    code for code in [*range(32), 127] if not chr(code).isspace()
+))
+_SPEECH_SYMBOLS = '|'.join(re.escape(key) for key in _SPEECH_TABLE if len(key) > 1)
+_SPEECH_SYMBOL_RE = re.compile(_SPEECH_SYMBOLS)
+# A run of symbols and whitespace is rewritten in one callback, so replacements
+# never leave doubled spaces behind
+_SPEECH_RE = re.compile(rf'(?:\s|{_SPEECH_SYMBOLS})+')
+
+
+def _speech_replacement(match) -> str:
+    """Speak a run of symbols as words separated by single spaces"""
+    words = ' '.join(filter(None, (
+        _SPEECH_TABLE[symbol].strip() for symbol in _SPEECH_SYMBOL_RE.findall(match.group(0))
+    )))
+    return f' {words} ' if words else ' '
+
+
+def iter_sentences(chunks):
+    """Group incrementally produced text chunks into sentences, flushing the rest at the end"""
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in SENTENCE_END_RE.finditer(buffer):
+            sentence = buffer[start:match.end()].strip()
+            if len(sentence) < MIN_SENTENCE_CHARS or sentence.endswith(SENTENCE_ABBREVIATIONS):
+                continue  # carried into the next sentence
+            yield sentence
+            start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _iter_audio(response):
+    """Yield streamed audio as it arrives: whole HTTP chunks for chunked responses
+    (ElevenLabs streaming), 4 KiB reads otherwise so playback never waits for the full body"""
+    chunked = getattr(response.raw, 'chunked', False)
+    return response.iter_content(chunk_size=None if chunked else 4096)
+
+
+def _start_system_player(file_path: str, stdin=None) -> Optional[subprocess.Popen]:
+    """Start the first available player on file_path ('-' reads stdin), without a shell; None if none exist"""
+    for command in SYSTEM_PLAYERS:
+        try:
+            return subprocess.Popen(command + [file_path], stdin=stdin,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            continue
+    return None
+
 
 class TTSManager:
     """Manages text-to-speech functionality with multiple provider support"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], cache_dir: Optional[str] = None):
         self.config = config
         self.enabled = config.get('enable_tts', True)
         self.provider = config.get('tts_provider', 'pyttsx3')
         
+        # Rendered ElevenLabs audio, keyed by voice/model/text
+        self.cache_dir = Path(cache_dir or "./triage_data/tts_cache")
+        
         # Initialize providers
         self.pyttsx3_engine = None
+        self._pyttsx3_queue = queue.Queue()
+        self._pyttsx3_speaking = threading.Event()
         self.elevenlabs_session = None
+        self.pcm_stream = None
+        
+        # The API key is checked on first use, not while the constructor blocks
+        self._elevenlabs_verified = False
+        self._elevenlabs_probe_lock = threading.Lock()
+        
+        # JSON request bodies around the text, keyed by streaming flag; reset by set_voice_settings
+        self._payload_templates = {}
+        self._voices_cache = None  # (fetched_at, result)
         
         # Interruption and streaming control
         self.interrupt_flag = threading.Event()
         self.current_playback_thread = None
+        self.external_player = None
+        
+        # Cancel event of the interruptible PCM utterance being played; each utterance
+        # gets its own, so interrupt_current_speech clearing interrupt_flag can't hide it
+        self._pcm_cancel = None
+        self._pcm_lock = threading.Lock()
         self.audio_queue = queue.Queue()
         self.is_playing = threading.Event()
         
+        # Single worker servicing speak_async requests
+        self.speech_queue = queue.PriorityQueue()
+        self._speech_sequence = itertools.count()  # FIFO within a priority
+        self.speech_worker = None
+        
+        # Single background renderer for prewarm(); newer requests displace older ones
+        self._prewarm_queue = queue.Queue(maxsize=PREWARM_QUEUE_SIZE)
+        self._prewarm_worker = None
+        
         if self.enabled:
             self._init_providers()
+            threading.Thread(target=self._prune_audio_cache, daemon=True).start()
+            self.speech_worker = threading.Thread(target=self._speech_worker_loop, daemon=True)
+            self.speech_worker.start()
+            if self.elevenlabs_session:
+                self._prewarm_worker = threading.Thread(target=self._prewarm_loop, daemon=True)
+                self._prewarm_worker.start()
     
     def _init_providers(self):
         """Initialize available TTS providers"""
-        # Initialize pyttsx3 as fallback
+        # Initialize pyttsx3 as fallback, on the one thread that will ever use the engine
         if HAS_PYTTSX3:
-            try:
-                self.pyttsx3_engine = pyttsx3.init()
-                self.pyttsx3_engine.setProperty('rate', 180)
-                self.pyttsx3_engine.setProperty('volume', 0.9)
-                
-                # Try to set a better voice if available
-                voices = self.pyttsx3_engine.getProperty('voices')
-                if voices:
-                    # Prefer female voices or voices with "english" in the name
-                    for voice in voices:
-                        if 'english' in voice.name.lower() or 'female' in voice.name.lower():
-                            self.pyttsx3_engine.setProperty('voice', voice.id)
-                            break
-                
-                print("✅ pyttsx3 TTS initialized")
-            except Exception as e:
-                print(f"⚠️  pyttsx3 initialization failed: {e}")
-                self.pyttsx3_engine = None
+            ready = threading.Event()
+            threading.Thread(target=self._pyttsx3_loop, args=(ready,), daemon=True).start()
+            ready.wait()
         
         # Initialize ElevenLabs
         if HAS_REQUESTS and self.config.get('elevenlabs_api_key'):
             try:
                 self.elevenlabs_session = requests.Session()
+                self.elevenlabs_session.mount('https://api.elevenlabs.io', HTTPAdapter(
+                    pool_connections=1, pool_maxsize=ELEVENLABS_POOL_SIZE
+                ))
                 self.elevenlabs_session.headers.update({
                     'xi-api-key': self.config['elevenlabs_api_key'],
                     'Content-Type': 'application/json'
                 })
-                
-                # Test the API key
-                response = self.elevenlabs_session.get('https://api.elevenlabs.io/v1/user')
-                if response.status_code == 200:
-                    print("✅ ElevenLabs TTS initialized")
-                else:
-                    print(f"⚠️  ElevenLabs API test failed: {response.status_code}")
-                    self.elevenlabs_session = None
             except Exception as e:
                 print(f"⚠️  ElevenLabs initialization failed: {e}")
                 self.elevenlabs_session = None
@@ -111,6 +259,144 @@ class TTSManager:
                 print("✅ pygame audio initialized")
             except Exception as e:
                 print(f"⚠️  pygame initialization failed: {e}")
+        
+        # One PCM output stream, opened once and reused by every streamed utterance
+        if HAS_SOUNDDEVICE and self.elevenlabs_session:
+            try:
+                self.pcm_stream = sounddevice.RawOutputStream(samplerate=PCM_SAMPLE_RATE,
+                                                              channels=1, dtype='int16')
+                self.pcm_stream.start()
+            except Exception as e:
+                print(f"⚠️  PCM output stream unavailable: {e}")
+                self.pcm_stream = None
+    
+    def _elevenlabs_ready(self) -> bool:
+        """Check the ElevenLabs API key once, on first use; drops the session if it is rejected"""
+        if self._elevenlabs_verified or not self.elevenlabs_session:
+            return self._elevenlabs_verified
+        
+        with self._elevenlabs_probe_lock:
+            if self._elevenlabs_verified or not self.elevenlabs_session:
+                return self._elevenlabs_verified
+            try:
+                # Also leaves a warm connection in the pool for the first utterance
+                response = self.elevenlabs_session.get('https://api.elevenlabs.io/v1/user',
+                                                       timeout=ELEVENLABS_TIMEOUT)
+                if response.status_code == 200:
+                    print("✅ ElevenLabs TTS initialized")
+                    self._elevenlabs_verified = True
+                else:
+                    print(f"⚠️  ElevenLabs API test failed: {response.status_code}")
+                    self.elevenlabs_session = None
+            except Exception as e:
+                print(f"⚠️  ElevenLabs initialization failed: {e}")
+                self.elevenlabs_session = None
+            return self._elevenlabs_verified
+    
+    def shutdown(self):
+        """Stop the pyttsx3 engine and prewarm threads and close the long-lived PCM output stream"""
+        if self._prewarm_worker is not None:
+            self._offer_prewarm(None)
+            self._prewarm_worker = None
+        if self.pyttsx3_engine is not None:
+            self._pyttsx3_queue.put(None)
+            self.pyttsx3_engine = None
+        if self.pcm_stream is not None:
+            try:
+                self.pcm_stream.close()
+            except Exception:
+                pass
+            self.pcm_stream = None
+    
+    def _audio_cache_path(self, text: str) -> Optional[Path]:
+        """Cache file for rendered ElevenLabs audio, or None if text is not cacheable"""
+        if len(text) > AUDIO_CACHE_MAX_CHARS:
+            return None
+        voice_id = self.config.get('elevenlabs_voice_id', 'Z9hrfEHGU3dykHntWvIY')
+        model = self.config.get('elevenlabs_model', 'eleven_flash_v2_5')
+        key = hashlib.blake2b(f"{voice_id}|{model}|{text}".encode(), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}.{'pcm' if self.pcm_stream is not None else 'mp3'}"
+    
+    def _output_params(self) -> Optional[Dict[str, str]]:
+        """ElevenLabs output_format query, raw PCM when the device stream is open (else default MP3)"""
+        if self.pcm_stream is not None:
+            return {'output_format': f'pcm_{PCM_SAMPLE_RATE}'}
+        return None
+    
+    def _play_cached_audio(self, cache_path: Path, interruptible: bool = True) -> bool:
+        """Play a cached clip: raw PCM straight to the device, MP3 through a player"""
+        if cache_path.suffix == '.pcm':
+            return self._play_pcm_bytes(cache_path.read_bytes(), interruptible)
+        return self._play_audio_file_interruptible(str(cache_path), interruptible)
+    
+    def will_use_elevenlabs(self) -> bool:
+        """Whether speak() picks ElevenLabs (mirrors its provider choice, without probing the key)"""
+        if not self.enabled or not self.elevenlabs_session:
+            return False
+        return self.provider == "elevenlabs" or not (self.provider == "pyttsx3" and self.pyttsx3_engine)
+    
+    def prewarm(self, phrases):
+        """Render fixed phrases into the audio cache in the background"""
+        # Clips are only rendered when speak() would actually play ElevenLabs audio
+        if self._prewarm_worker is None or not self.will_use_elevenlabs():
+            return
+        self._offer_prewarm(tuple(phrase for phrase in phrases if phrase))
+    
+    def _offer_prewarm(self, item):
+        """Queue phrases (or the None stop marker) without blocking, dropping the oldest request if full"""
+        while True:
+            try:
+                self._prewarm_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._prewarm_queue.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def _prewarm_loop(self):
+        """Render queued prewarm phrases one request at a time until shutdown"""
+        while True:
+            phrases = self._prewarm_queue.get()
+            if phrases is None:
+                return
+            if not self._elevenlabs_ready():
+                continue
+            for phrase in phrases:
+                clean_text = self._clean_text_for_speech(phrase)
+                cache_path = self._audio_cache_path(clean_text)
+                if not cache_path or cache_path.exists():
+                    continue
+                try:
+                    response = self.elevenlabs_session.post(
+                        self._elevenlabs_url(), params=self._output_params(),
+                        data=self._elevenlabs_payload(clean_text), timeout=ELEVENLABS_TIMEOUT
+                    )
+                    if response.status_code == 200:
+                        self._write_audio_cache(cache_path, response.content)
+                except Exception as e:
+                    print(f"⚠️  TTS prewarm error: {e}")
+                    break
+    
+    def _prune_audio_cache(self):
+        """Delete the least recently written clips once the cache exceeds AUDIO_CACHE_MAX_FILES"""
+        try:
+            clips = sorted((path for path in self.cache_dir.glob('*') if path.suffix in ('.mp3', '.pcm')),
+                           key=lambda path: path.stat().st_mtime)
+            for clip in clips[:-AUDIO_CACHE_MAX_FILES]:
+                clip.unlink()
+        except OSError as e:
+            print(f"⚠️  TTS cache prune error: {e}")
+    
+    def _write_audio_cache(self, cache_path: Path, audio: Union[bytes, bytearray]):
+        """Atomically store rendered audio in the cache"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False) as temp_file:
+                temp_file.write(audio)
+            os.replace(temp_file.name, cache_path)
+        except OSError as e:
+            print(f"⚠️  TTS cache write error: {e}")
     
     def speak(self, text: str, priority: str = "normal", interruptible: bool = True) -> bool:
         """
@@ -135,13 +421,13 @@ class TTSManager:
         clean_text = self._clean_text_for_speech(text)
         
         # Choose provider based on configuration and availability
-        if self.provider == "elevenlabs" and self.elevenlabs_session:
+        if self.provider == "elevenlabs" and self._elevenlabs_ready():
             return self._speak_elevenlabs_streaming(clean_text, priority, interruptible)
         elif self.provider == "pyttsx3" and self.pyttsx3_engine:
             return self._speak_pyttsx3(clean_text, interruptible)
         else:
             # Fallback to any available provider
-            if self.elevenlabs_session:
+            if self._elevenlabs_ready():
                 return self._speak_elevenlabs_streaming(clean_text, priority, interruptible)
             elif self.pyttsx3_engine:
                 return self._speak_pyttsx3(clean_text, interruptible)
@@ -160,6 +446,25 @@ class TTSManager:
             except:
                 pass
         
+        # Stop an interruptible pyttsx3 utterance; stop() is safe from other threads
+        if self._pyttsx3_speaking.is_set():
+            try:
+                self.pyttsx3_engine.stop()
+            except:
+                pass
+        
+        # Cancel PCM playback and wait (like the thread join below) until it has stopped writing
+        cancel = self._pcm_cancel
+        if cancel is not None:
+            cancel.set()
+            if self._pcm_lock.acquire(timeout=0.5):
+                self._pcm_lock.release()
+        
+        # Stop a command-line player, including non-interruptible playback
+        player = self.external_player
+        if player is not None and player.poll() is None:
+            player.terminate()
+        
         # Wait for current playback to stop
         if self.current_playback_thread and self.current_playback_thread.is_alive():
             self.current_playback_thread.join(timeout=0.5)
@@ -170,34 +475,13 @@ class TTSManager:
     
     def _clean_text_for_speech(self, text: str) -> str:
         """Clean text to make it more suitable for speech"""
-        # Remove or replace problematic characters
-        replacements = {
-            '@': ' at ',
-            '#': ' number ',
-            '&': ' and ',
-            '%': ' percent ',
-            '$': ' dollars ',
-            '€': ' euros ',
-            '£': ' pounds ',
-            '→': ' goes to ',
-            '←': ' comes from ',
-            '✅': ' success ',
-            '❌': ' error ',
-            '⚠️': ' warning ',
-            '🔊': '',
-            '📧': ' email ',
-            '🗑️': ' trash ',
-            '⏰': ' later ',
-            '⚡': ' action needed ',
-            '🤖': ' AI ',
-        }
-        
-        clean_text = text
-        for old, new in replacements.items():
-            clean_text = clean_text.replace(old, new)
+        clean_text = text.translate(_SPEECH_CHAR_TABLE)
         
-        # Remove extra whitespace
-        clean_text = ' '.join(clean_text.split())
+        # Most prompts have no variation-selector emoji, doubled spaces or other
+        # whitespace (all non-printable except ' '), so the regex pass can be skipped
+        if '\ufe0f' in clean_text or '  ' in clean_text or not clean_text.isprintable():
+            clean_text = _SPEECH_RE.sub(_speech_replacement, clean_text)
+        clean_text = clean_text.strip()
         
         # Limit length for better performance
         if len(clean_text) > 500:
@@ -205,15 +489,13 @@ class TTSManager:
         
         return clean_text
     
-    def _speak_elevenlabs_streaming(self, text: str, priority: str = "normal", interruptible: bool = True) -> bool:
-        """Speak using ElevenLabs API with streaming"""
-        try:
-            voice_id = self.config.get('elevenlabs_voice_id', 'Z9hrfEHGU3dykHntWvIY')
+    def _elevenlabs_payload(self, text: str, streaming: bool = False) -> bytes:
+        """Build the ElevenLabs text-to-speech request body, serializing only the text per call"""
+        template = self._payload_templates.get(streaming)
+        if template is None:
             model = self.config.get('elevenlabs_model', 'eleven_flash_v2_5')
-            
-            # Prepare request data for streaming
             data = {
-                "text": text,
+                "text": "",
                 "model_id": model,
                 "voice_settings": {
                     "stability": 0.5,
@@ -224,18 +506,44 @@ class TTSManager:
             }
             
             # Add optimization settings for Flash v2.5
-            if model == "eleven_flash_v2_5":
+            if streaming and model == "eleven_flash_v2_5":
                 data["voice_settings"]["optimize_streaming_latency"] = 4  # Max optimization
-                data["voice_settings"]["output_format"] = "mp3_44100_128"
-            
-            # Use streaming endpoint
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
             
+            # "text" is serialized first, so the body splits around its empty value
+            body = json.dumps(data)
+            template = (b'{"text": ', body[len('{"text": ""'):].encode())
+            self._payload_templates[streaming] = template
+        
+        return template[0] + json.dumps(text).encode() + template[1]
+    
+    def _elevenlabs_url(self, streaming: bool = False) -> str:
+        """ElevenLabs text-to-speech endpoint for the configured voice"""
+        voice_id = self.config.get('elevenlabs_voice_id', 'Z9hrfEHGU3dykHntWvIY')
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+        return f"{url}/stream" if streaming else url
+    
+    def _speak_elevenlabs_streaming(self, text: str, priority: str = "normal", interruptible: bool = True) -> bool:
+        """Speak using ElevenLabs API with streaming"""
+        # Previously rendered phrases skip synthesis entirely
+        cache_path = self._audio_cache_path(text)
+        if cache_path and cache_path.exists():
+            return self._play_cached_audio(cache_path, interruptible)
+        
+        try:
             # Make streaming request
-            response = self.elevenlabs_session.post(url, json=data, stream=True)
+            response = self.elevenlabs_session.post(
+                self._elevenlabs_url(streaming=True),
+                params=self._output_params(),
+                data=self._elevenlabs_payload(text, streaming=True),
+                stream=True,
+                timeout=ELEVENLABS_TIMEOUT
+            )
             
             if response.status_code == 200:
-                return self._play_streaming_audio(response, interruptible)
+                # PCM plays while it downloads instead of being buffered to an MP3 file first
+                if self.pcm_stream is not None:
+                    return self._play_pcm_stream(response, interruptible, cache_path)
+                return self._play_streaming_audio(response, interruptible, cache_path)
             else:
                 print(f"⚠️  ElevenLabs streaming error: {response.status_code}")
                 # Fallback to non-streaming
@@ -248,39 +556,19 @@ class TTSManager:
     def _speak_elevenlabs_fallback(self, text: str, priority: str = "normal", interruptible: bool = True) -> bool:
         """Non-streaming ElevenLabs fallback"""
         try:
-            voice_id = self.config.get('elevenlabs_voice_id', 'Z9hrfEHGU3dykHntWvIY')
-            model = self.config.get('elevenlabs_model', 'eleven_flash_v2_5')
-            
-            data = {
-                "text": text,
-                "model_id": model,
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.8,
-                    "style": 0.2,
-                    "use_speaker_boost": True
-                }
-            }
-            
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-            response = self.elevenlabs_session.post(url, json=data)
+            response = self.elevenlabs_session.post(
+                self._elevenlabs_url(), params=self._output_params(),
+                data=self._elevenlabs_payload(text), timeout=ELEVENLABS_TIMEOUT
+            )
             
             if response.status_code == 200:
-                # Save audio to temporary file
-                with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                    temp_file.write(response.content)
-                    temp_path = temp_file.name
-                
-                # Play audio with interruption support
-                success = self._play_audio_file_interruptible(temp_path, interruptible)
-                
-                # Clean up
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
-                
-                return success
+                cache_path = self._audio_cache_path(text)
+                if cache_path:
+                    self._write_audio_cache(cache_path, response.content)
+                    return self._play_cached_audio(cache_path, interruptible)
+                if self.pcm_stream is not None:
+                    return self._play_pcm_bytes(response.content, interruptible)
+                return self._play_audio_bytes(response.content, interruptible)
             else:
                 print(f"⚠️  ElevenLabs API error: {response.status_code}")
                 return self._speak_pyttsx3(text, interruptible)
@@ -289,99 +577,270 @@ class TTSManager:
             print(f"⚠️  ElevenLabs fallback error: {e}")
             return self._speak_pyttsx3(text, interruptible)
     
+    def _pyttsx3_loop(self, ready: threading.Event):
+        """Own the pyttsx3 engine: create it, then speak queued requests until shutdown"""
+        try:
+            engine = pyttsx3.init()
+            engine.setProperty('rate', 180)
+            engine.setProperty('volume', 0.9)
+            
+            # Try to set a better voice if available
+            voices = engine.getProperty('voices')
+            if voices:
+                # Prefer female voices or voices with "english" in the name
+                for voice in voices:
+                    name = voice.name.lower()
+                    if 'english' in name or 'female' in name:
+                        engine.setProperty('voice', voice.id)
+                        break
+            
+            self.pyttsx3_engine = engine
+            print("✅ pyttsx3 TTS initialized")
+        except Exception as e:
+            print(f"⚠️  pyttsx3 initialization failed: {e}")
+            self.pyttsx3_engine = None
+        finally:
+            ready.set()
+        
+        while self.pyttsx3_engine is not None:
+            request = self._pyttsx3_queue.get()
+            if request is None:
+                return
+            text, interruptible, done = request
+            if interruptible:
+                self._pyttsx3_speaking.set()
+            try:
+                engine.say(text)
+                engine.runAndWait()
+            except Exception as e:
+                print(f"⚠️  pyttsx3 TTS error: {e}")
+                print(f"🔊 TTS: {text}")  # Text fallback
+            finally:
+                self._pyttsx3_speaking.clear()
+                done.set()
+    
     def _speak_pyttsx3(self, text: str, interruptible: bool = True) -> bool:
         """Speak using pyttsx3"""
         if not self.pyttsx3_engine:
             print(f"🔊 TTS: {text}")  # Text fallback
             return True
         
-        try:
+        # The engine thread speaks it; interrupt_current_speech stops the engine
+        done = threading.Event()
+        self._pyttsx3_queue.put((text, interruptible, done))
+        done.wait()
+        return True
+    
+    def _play_pcm_bytes(self, audio: bytes, interruptible: bool = True) -> bool:
+        """Write complete 16-bit PCM to the shared output stream, stopping on interrupt"""
+        cancel = threading.Event()
+        with self._pcm_lock:
             if interruptible:
-                # For interruptible speech, we need to check periodically
-                def speak_with_interrupt():
-                    self.pyttsx3_engine.say(text)
-                    self.pyttsx3_engine.runAndWait()
-                
-                self.current_playback_thread = threading.Thread(target=speak_with_interrupt, daemon=True)
-                self.current_playback_thread.start()
-                
-                # Wait for completion or interruption
-                while self.current_playback_thread.is_alive():
-                    if self.interrupt_flag.is_set():
-                        try:
-                            self.pyttsx3_engine.stop()
-                        except:
-                            pass
-                        break
-                    time.sleep(0.1)
-            else:
-                self.pyttsx3_engine.say(text)
-                self.pyttsx3_engine.runAndWait()
-            
-            return True
-        except Exception as e:
-            print(f"⚠️  pyttsx3 TTS error: {e}")
-            print(f"🔊 TTS: {text}")  # Text fallback
-            return True
+                self._pcm_cancel = cancel
+            self.is_playing.set()
+            try:
+                return self._write_pcm(memoryview(audio)[:len(audio) - len(audio) % 2], cancel)
+            except Exception as e:
+                print(f"⚠️  PCM playback error: {e}")
+                return False
+            finally:
+                self._pcm_cancel = None
+                self.is_playing.clear()
+    
+    def _drop_pcm(self):
+        """Drop what is still queued on the device, keeping the stream open"""
+        self.pcm_stream.abort()
+        self.pcm_stream.start()
+    
+    def _write_pcm(self, data, cancel: threading.Event) -> bool:
+        """Write PCM to the shared output stream in small slices; False once cancel is set"""
+        view = memoryview(data)
+        for start in range(0, len(view), PCM_WRITE_BYTES):
+            if cancel.is_set():
+                self._drop_pcm()
+                return False
+            self.pcm_stream.write(view[start:start + PCM_WRITE_BYTES])
+        return True
+    
+    def _play_pcm_stream(self, response, interruptible: bool = True,
+                         cache_path: Optional[Path] = None) -> bool:
+        """Play streamed 16-bit PCM on the shared output stream while a helper thread downloads"""
+        chunks = queue.Queue(maxsize=PCM_BUFFER_CHUNKS)
+        stopped = threading.Event()
+        
+        def offer(item):
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        
+        def download():
+            # Socket stalls only drain the buffer; device writes never block the socket
+            try:
+                for chunk in _iter_audio(response):
+                    if stopped.is_set():
+                        return
+                    offer(chunk)
+            except Exception as e:
+                offer(e)
+            finally:
+                offer(None)
+        
+        cancel = threading.Event()
+        with self._pcm_lock:
+            if interruptible:
+                self._pcm_cancel = cancel
+            self.is_playing.set()
+            downloader = threading.Thread(target=download, daemon=True)
+            downloader.start()
+            try:
+                partial = b''
+                rendered = [] if cache_path else None
+                while not cancel.is_set():
+                    try:
+                        chunk = chunks.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if chunk is None:
+                        # Keep complete renders of cacheable phrases for next time
+                        if rendered is not None:
+                            self._write_audio_cache(cache_path, b''.join(rendered))
+                        return True
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    if rendered is not None:
+                        rendered.append(chunk)
+                    # Only whole 2-byte samples can be written
+                    data = partial + chunk if partial else chunk
+                    usable = len(data) - len(data) % 2
+                    if not self._write_pcm(memoryview(data)[:usable], cancel):
+                        return False
+                    partial = data[usable:]
+                self._drop_pcm()  # cancelled while waiting for data
+                return False
+            except Exception as e:
+                print(f"⚠️  Streaming audio error: {e}")
+                return False
+            finally:
+                stopped.set()
+                response.close()
+                self._pcm_cancel = None
+                self.is_playing.clear()
     
-    def _play_streaming_audio(self, response, interruptible: bool = True) -> bool:
-        """Play streaming audio from ElevenLabs"""
+    def _play_streaming_audio(self, response, interruptible: bool = True,
+                              cache_path: Optional[Path] = None) -> bool:
+        """Play streaming audio from ElevenLabs, keeping it in the cache if requested"""
+        # pygame needs a complete file, but a command-line player can decode from a pipe
+        if not HAS_PYGAME and os.name == 'posix':
+            player = _start_system_player('-', stdin=subprocess.PIPE)
+            if player is not None:
+                return self._pipe_streaming_audio(response, player, interruptible, cache_path)
+        
         try:
-            # Create a temporary file to buffer the stream
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                temp_path = temp_file.name
-                
-                # Stream audio data and write to file
-                for chunk in response.iter_content(chunk_size=1024):
-                    if interruptible and self.interrupt_flag.is_set():
-                        break
-                    if chunk:
-                        temp_file.write(chunk)
-                
-                # If we were interrupted during streaming, don't play
+            # Buffer the stream in memory; the bytearray grows in place and is
+            # handed on as-is rather than copied to bytes
+            audio = bytearray()
+            for chunk in _iter_audio(response):
                 if interruptible and self.interrupt_flag.is_set():
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
-                    return False
-            
-            # Play the buffered audio
-            success = self._play_audio_file_interruptible(temp_path, interruptible)
+                    return False  # interrupted during streaming, don't play
+                audio += chunk
             
-            # Clean up
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+            # Keep complete renders of cacheable phrases for next time
+            if cache_path:
+                self._write_audio_cache(cache_path, audio)
+                if cache_path.exists():
+                    return self._play_audio_file_interruptible(str(cache_path), interruptible)
             
-            return success
+            return self._play_audio_bytes(audio, interruptible)
             
         except Exception as e:
             print(f"⚠️  Streaming audio error: {e}")
             return False
+        finally:
+            response.close()
+    
+    def _play_audio_bytes(self, audio: Union[bytes, bytearray], interruptible: bool = True) -> bool:
+        """Play in-memory MP3 without writing it to disk where the player allows it"""
+        if HAS_PYGAME or os.name == 'posix':
+            return self._play_audio_file_interruptible(io.BytesIO(audio), interruptible)
+        
+        # os.startfile needs a real file and returns before playback ends, so it is left behind
+        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
+            temp_file.write(audio)
+        return self._play_audio_file_interruptible(temp_file.name, interruptible)
+    
+    def _pipe_streaming_audio(self, response, player: subprocess.Popen, interruptible: bool = True,
+                              cache_path: Optional[Path] = None) -> bool:
+        """Feed MP3 chunks to a player's stdin as they arrive, so playback starts with the first bytes"""
+        self.external_player = player
+        self.is_playing.set()
+        try:
+            rendered = [] if cache_path else None
+            for chunk in _iter_audio(response):
+                if interruptible and self.interrupt_flag.is_set():
+                    player.terminate()
+                    return False
+                # Blocks while the player's pipe is full, pacing the download
+                player.stdin.write(chunk)
+                if rendered is not None:
+                    rendered.append(chunk)
+            player.stdin.close()
+            player.wait()
+            if rendered is not None and player.returncode == 0:
+                self._write_audio_cache(cache_path, b''.join(rendered))
+            return player.returncode == 0
+        except BrokenPipeError:
+            return False  # player was terminated by an interrupt
+        except Exception as e:
+            print(f"⚠️  Streaming audio error: {e}")
+            player.terminate()
+            return False
+        finally:
+            response.close()
+            self.is_playing.clear()
     
-    def _play_audio_file_interruptible(self, file_path: str, interruptible: bool = True) -> bool:
-        """Play audio file with interruption support"""
+    def _play_audio_file_interruptible(self, file_path: Union[str, io.BytesIO],
+                                       interruptible: bool = True) -> bool:
+        """Play an audio file, or in-memory MP3, with interruption support"""
         def play_audio():
             self.is_playing.set()
             try:
                 if HAS_PYGAME:
-                    pygame.mixer.music.load(file_path)
+                    if isinstance(file_path, str):
+                        pygame.mixer.music.load(file_path)
+                    else:
+                        pygame.mixer.music.load(file_path, 'mp3')
                     pygame.mixer.music.play()
                     
                     # Wait for playback to complete or interruption
                     while pygame.mixer.music.get_busy():
-                        if interruptible and self.interrupt_flag.is_set():
-                            pygame.mixer.music.stop()
-                            break
-                        time.sleep(0.1)
+                        if interruptible:
+                            # Wakes as soon as an interrupt is requested
+                            if self.interrupt_flag.wait(0.1):
+                                pygame.mixer.music.stop()
+                                break
+                        else:
+                            time.sleep(0.1)
                 else:
                     # Fallback to system command
                     if os.name == 'posix':
-                        os.system(f"mpg123 -q '{file_path}' 2>/dev/null &")
+                        in_memory = not isinstance(file_path, str)
+                        player = self.external_player = _start_system_player(
+                            '-' if in_memory else file_path,
+                            stdin=subprocess.PIPE if in_memory else None
+                        )
+                        # interrupt_current_speech terminates the player, ending the wait
+                        if player is not None:
+                            if interruptible and self.interrupt_flag.is_set():
+                                player.terminate()  # interrupted while it was starting
+                            if in_memory:
+                                player.communicate(file_path.getvalue())
+                            else:
+                                player.wait()
                     elif os.name == 'nt':
-                        os.system(f'start /min "" "{file_path}"')
+                        os.startfile(file_path)
             except Exception as e:
                 print(f"⚠️  Audio playback error: {e}")
             finally:
@@ -425,9 +884,12 @@ class TTSManager:
         # System command fallback
         try:
             if os.name == 'posix':  # Linux/macOS
-                os.system(f"mpg123 -q '{file_path}' 2>/dev/null || ffplay -nodisp -autoexit -v quiet '{file_path}' 2>/dev/null")
+                player = self.external_player = _start_system_player(file_path)
+                if player is None:
+                    return False
+                player.wait()
             elif os.name == 'nt':  # Windows
-                os.system(f'start /min "" "{file_path}"')
+                os.startfile(file_path)
             return True
         except Exception as e:
             print(f"⚠️  System audio playback error: {e}")
@@ -438,11 +900,67 @@ class TTSManager:
         if not self.enabled:
             return
         
-        def speak_thread():
-            self.speak(text, priority)
+        # Handed to the long-lived worker instead of a thread per utterance
+        rank = SPEECH_PRIORITIES.get(priority, SPEECH_PRIORITIES["normal"])
+        self.speech_queue.put((rank, next(self._speech_sequence), text, priority))
+        if rank == SPEECH_PRIORITIES["high"]:
+            self.interrupt_current_speech()
+    
+    def speak_stream(self, chunks, interruptible: bool = True) -> bool:
+        """Speak incrementally produced text (e.g. a streamed LLM reply) sentence by sentence
+        
+        chunks is read on a helper thread, so the next sentence is being produced
+        while the current one is synthesized and played.
+        """
+        if not self.enabled:
+            return False
+        
+        sentences = queue.Queue(maxsize=2)
+        stopped = threading.Event()
         
-        thread = threading.Thread(target=speak_thread, daemon=True)
-        thread.start()
+        def offer(item):
+            # Gives up once the consumer has stopped, so a full queue can't block forever
+            while not stopped.is_set():
+                try:
+                    sentences.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for sentence in iter_sentences(chunks):
+                    if not offer(sentence):
+                        return
+            except Exception as e:
+                print(f"⚠️  Speech stream error: {e}")
+            finally:
+                offer(None)
+        
+        threading.Thread(target=produce, daemon=True).start()
+        spoken = False
+        try:
+            while True:
+                sentence = sentences.get()
+                if sentence is None:
+                    break
+                # An interrupted or failed sentence ends the whole stream
+                if not self.speak(sentence, interruptible=interruptible):
+                    break
+                spoken = True
+        finally:
+            stopped.set()
+        return spoken
+    
+    def _speech_worker_loop(self):
+        """Speak queued async requests by priority, oldest first within a priority"""
+        while True:
+            _, _, text, priority = self.speech_queue.get()
+            try:
+                self.speak(text, priority)
+            except Exception as e:
+                print(f"⚠️  Async speech error: {e}")
     
     def set_voice_settings(self, **kwargs):
         """Update voice settings for ElevenLabs"""
@@ -454,17 +972,23 @@ class TTSManager:
             self.config['elevenlabs_stability'] = kwargs['stability']
         if 'similarity_boost' in kwargs:
             self.config['elevenlabs_similarity_boost'] = kwargs['similarity_boost']
+        self._payload_templates.clear()
+        self._voices_cache = None
     
     def list_available_voices(self) -> Dict[str, Any]:
         """List available voices from ElevenLabs"""
         if not self.elevenlabs_session:
             return {"error": "ElevenLabs not initialized"}
         
+        if self._voices_cache and time.time() - self._voices_cache[0] < VOICES_CACHE_TTL:
+            return self._voices_cache[1]
+        
         try:
-            response = self.elevenlabs_session.get('https://api.elevenlabs.io/v1/voices')
+            response = self.elevenlabs_session.get('https://api.elevenlabs.io/v1/voices',
+                                                   timeout=ELEVENLABS_TIMEOUT)
             if response.status_code == 200:
                 voices_data = response.json()
-                return {
+                result = {
                     "voices": [
                         {
                             "voice_id": voice["voice_id"],
@@ -475,6 +999,8 @@ class TTSManager:
                         for voice in voices_data.get("voices", [])
                     ]
                 }
+                self._voices_cache = (time.time(), result)
+                return result
             else:
                 return {"error": f"API error: {response.status_code}"}
         except Exception as e: